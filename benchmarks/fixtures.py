@@ -0,0 +1,215 @@
+"""
+Offline HTML corpora for benchmarks.
+
+A corpus is a directory of HTML files plus a manifest.json listing the seed pages:
+    {"seeds": ["/site-000/index.html", ...]}
+It is served by FixtureServer, so the crawler sees ordinary http:// URLs.
+
+    python -m benchmarks.fixtures generate data/bench_corpus --articles 200
+    python -m benchmarks.fixtures record data/recorded_corpus https://www.ndrc.gov.cn/xwdt/
+"""
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urljoin, urlparse
+
+logger = logging.getLogger(__name__)
+
+ARTICLES_PER_SITE = 5 # Matches the crawler's per-seed limit
+WORDS = ["政策", "税收", "社保", "户籍", "改革", "市场", "准入", "监管", "发展", "规范", "有序", "产业",
+         "财政", "补贴", "试点", "清理", "严禁", "不得", "金额", "亿元", "部门", "规划", "地方", "企业"]
+
+def load_manifest(corpus_dir):
+    with open(os.path.join(corpus_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def _write(path, html):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+def _paragraphs(rng, count):
+    return "".join(
+        "<p>" + "".join(rng.choice(WORDS) for _ in range(rng.randint(40, 80))) + "。</p>"
+        for _ in range(count)
+    )
+
+def generate_corpus(corpus_dir, articles: int, seed: int = 42):
+    """Writes a deterministic synthetic corpus shaped like a government news site."""
+    rng = random.Random(seed)
+    sites = -(-articles // ARTICLES_PER_SITE)
+    seeds = []
+    for s in range(sites):
+        site = f"site-{s:03d}"
+        links = []
+        for a in range(ARTICLES_PER_SITE):
+            path = f"/{site}/art/2025/{s:03d}{a:02d}.html"
+            links.append(f'<li><a href="{path}">{site} 通知 {a}</a></li>')
+            title = f"关于{rng.choice(WORDS)}{rng.choice(WORDS)}的通知 {s}-{a}"
+            _write(os.path.join(corpus_dir, path.lstrip("/")), (
+                f"<html><head><title>{title}</title></head><body>"
+                f"<nav><a href='/{site}/index.html'>首页</a></nav>"
+                f"<h1>{title}</h1><article>{_paragraphs(rng, rng.randint(8, 20))}</article>"
+                f"<footer>{_paragraphs(rng, 1)}</footer></body></html>"
+            ))
+        nav = "".join(f'<a href="/{site}/index.html">栏目{i}</a>' for i in range(5))
+        _write(os.path.join(corpus_dir, site, "index.html"),
+               f"<html><head><title>{site}</title></head><body><nav>{nav}</nav><ul>{''.join(links)}</ul></body></html>")
+        seeds.append(f"/{site}/index.html")
+
+    _write(os.path.join(corpus_dir, "manifest.json"), json.dumps({"seeds": seeds, "generated": True, "seed": seed}, indent=2))
+    logger.info(f"Generated {sites} sites / {sites * ARTICLES_PER_SITE} articles in {corpus_dir}")
+    return seeds
+
+def _local_path(url):
+    """Maps a live URL to its path inside a recorded corpus ("/<host>/<path>")."""
+    parsed = urlparse(url)
+    path = parsed.path or "/"
+    if path.endswith("/"):
+        path += "index.html"
+    if parsed.query:
+        path += "_" + parsed.query.replace("/", "_").replace("&", "_")
+    return f"/{parsed.netloc}{path}"
+
+def record_corpus(corpus_dir, seed_urls):
+    """
+    Fetches live seed pages and every article link the crawler could follow, rewriting links to stay local.
+    The crawler follows an arbitrary subset of the links, so all of them are recorded; same-host links
+    that could not be recorded are unlinked, so replays never leave the corpus or hit a 404.
+    """
+    import requests
+    from bs4 import BeautifulSoup
+    from src.crawler import Crawler
+
+    crawler = Crawler()
+    seeds = []
+    try:
+        for seed_url in seed_urls:
+            response = requests.get(seed_url, headers=crawler.headers, timeout=10)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.content, "html.parser")
+            links = sorted(crawler.get_links(seed_url, soup))
+            pages = [(seed_url, soup)]
+            for link in links:
+                try:
+                    r = requests.get(link, headers=crawler.headers, timeout=10)
+                    r.raise_for_status()
+                    pages.append((link, BeautifulSoup(r.content, "html.parser")))
+                except Exception as e:
+                    logger.error(f"Error recording {link}: {e}")
+
+            host = urlparse(seed_url).netloc
+            recorded = {url for url, _ in pages}
+            for url, page in pages:
+                for a_tag in page.find_all("a", href=True):
+                    target = urljoin(url, a_tag["href"])
+                    if urlparse(target).netloc != host:
+                        continue
+                    if target in recorded:
+                        a_tag["href"] = _local_path(target)
+                    else:
+                        del a_tag["href"]
+                _write(os.path.join(corpus_dir, _local_path(url).lstrip("/")), str(page))
+            seeds.append(_local_path(seed_url))
+            logger.info(f"Recorded {len(pages)} pages from {seed_url}")
+    finally:
+        crawler.close()
+
+    _write(os.path.join(corpus_dir, "manifest.json"), json.dumps({"seeds": seeds, "generated": False}, indent=2))
+    return seeds
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, server_state=None, **kwargs):
+        self.server_state = server_state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        state = self.server_state
+        with state["lock"]:
+            state["requests"] += 1
+        if state["latency_ms"]:
+            time.sleep(state["latency_ms"] / 1000)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """Serves a corpus directory on localhost in a background thread, with optional per-request latency."""
+
+    def __init__(self, corpus_dir, port: int = 0, latency_ms: float = 0):
+        self.corpus_dir = corpus_dir
+        self.state = {"requests": 0, "latency_ms": latency_ms, "lock": threading.Lock()}
+        handler = partial(_FixtureHandler, directory=corpus_dir, server_state=self.state)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self.state["requests"]
+
+    def url_for(self, path):
+        return self.base_url + path
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Benchmark HTML fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Write a synthetic corpus")
+    gen.add_argument("corpus_dir")
+    gen.add_argument("--articles", type=int, default=200)
+    gen.add_argument("--seed", type=int, default=42)
+
+    rec = sub.add_parser("record", help="Record live pages into a corpus")
+    rec.add_argument("corpus_dir")
+    rec.add_argument("urls", nargs="+")
+
+    serve = sub.add_parser("serve", help="Serve a corpus until Ctrl+C")
+    serve.add_argument("corpus_dir")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=0)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate_corpus(args.corpus_dir, args.articles, args.seed)
+    elif args.command == "record":
+        record_corpus(args.corpus_dir, args.urls)
+    else:
+        with FixtureServer(args.corpus_dir, args.port, args.latency_ms) as server:
+            for path in load_manifest(args.corpus_dir)["seeds"]:
+                print(server.url_for(path))
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+
+if __name__ == "__main__":
+    main()
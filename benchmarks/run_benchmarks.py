@@ -0,0 +1,189 @@
+"""
+Offline end-to-end benchmark: fixture HTTP server + stub LLM + throwaway SQLite DB.
+
+    python -m benchmarks.run_benchmarks --sizes 10 50 200 --llm-latency-ms 50 --output bench_results.jsonl
+
+Reports, per corpus size: crawl pages/s, parse ms/page, DB insert rows/s and pipeline
+articles/min (sequential and streaming). Each result line records the git commit so
+runs can be compared across commits.
+"""
+import os
+import json
+import time
+import math
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def configure_environment(work_dir, llm_latency_ms, llm_failure_rate):
+    """Must run before any `src` import: config is read from the environment at import time."""
+    os.environ["DB_PATH"] = os.path.join(work_dir, "bench.db")
+    os.environ["LLM_PROVIDER"] = "stub"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(llm_latency_ms)
+    os.environ["STUB_LLM_FAILURE_RATE"] = str(llm_failure_rate)
+    os.environ["METRICS_PROM_PATH"] = ""
+
+def reset_db():
+    from src.database import SessionLocal, Article, DailyDigest, Metric, Job
+    db = SessionLocal()
+    try:
+        # Settings are kept: wiping data_version would let cached reads serve stale values
+        for model in (Article, DailyDigest, Metric, Job):
+            db.query(model).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def count_articles(**filters):
+    from src.database import SessionLocal, Article
+    db = SessionLocal()
+    try:
+        return db.query(Article).filter_by(**filters).count()
+    finally:
+        db.close()
+
+def bench_crawl(server, seed_urls):
+    from src.crawler import Crawler
+    reset_db()
+    requests_before = server.request_count
+    crawler = Crawler()
+    start = time.perf_counter()
+    for url in seed_urls:
+        crawler.crawl_site(url)
+    elapsed = time.perf_counter() - start
+    crawler.close()
+    pages = server.request_count - requests_before
+    return {"crawl_pages": pages, "crawl_pages_per_s": pages / elapsed if elapsed else None}
+
+def bench_parse(corpus_dir, limit):
+    from bs4 import BeautifulSoup
+    from src.crawler import Crawler
+    files = []
+    for root, _, names in os.walk(corpus_dir):
+        files.extend(os.path.join(root, n) for n in names if n.endswith(".html") and n != "index.html")
+    files = sorted(files)[:limit]
+    pages = []
+    for path in files:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    crawler = Crawler()
+    start = time.perf_counter()
+    for html in pages:
+        crawler.parse_article("http://fixture/", BeautifulSoup(html, "html.parser"))
+    elapsed = time.perf_counter() - start
+    crawler.close()
+    return {"parse_pages": len(pages), "parse_ms_per_page": elapsed * 1000 / len(pages) if pages else None}
+
+def bench_db_insert(count):
+    from src.crawler import Crawler
+    reset_db()
+    crawler = Crawler()
+    content = "政策 " * 400
+    start = time.perf_counter()
+    for i in range(count):
+        crawler.save_article(f"http://fixture/insert/{i}", f"Insert benchmark {i}", content)
+    elapsed = time.perf_counter() - start
+    crawler.close()
+    return {"db_insert_rows_per_s": count / elapsed if elapsed else None}
+
+def bench_pipeline(seed_urls, streaming):
+    from src.crawler import Crawler
+    from src.processor import Processor
+    from src.pipeline import StreamingPipeline
+    reset_db()
+    start = time.perf_counter()
+    if streaming:
+        StreamingPipeline(seed_urls).run()
+    else:
+        crawler = Crawler()
+        for url in seed_urls:
+            crawler.crawl_site(url)
+        crawler.close()
+        processor = Processor()
+        processor.process_pending_articles()
+        processor.close()
+    elapsed = time.perf_counter() - start
+    processed = count_articles(is_processed=True)
+    key = "stream" if streaming else "sequential"
+    return {
+        f"pipeline_{key}_seconds": elapsed,
+        f"pipeline_{key}_articles_per_min": processed / elapsed * 60 if elapsed else None,
+    }
+
+def run_size(server, corpus_dir, seeds, size, per_site):
+    seed_urls = [server.url_for(p) for p in seeds[:math.ceil(size / per_site)]]
+    result = {"size": size, "sites": len(seed_urls)}
+    result.update(bench_crawl(server, seed_urls))
+    result.update(bench_parse(corpus_dir, size))
+    result.update(bench_db_insert(size))
+    result.update(bench_pipeline(seed_urls, streaming=False))
+    result.update(bench_pipeline(seed_urls, streaming=True))
+    return result
+
+def print_table(results):
+    columns = ["size", "crawl_pages_per_s", "parse_ms_per_page", "db_insert_rows_per_s",
+               "pipeline_sequential_articles_per_min", "pipeline_stream_articles_per_min"]
+    headers = ["size", "crawl pages/s", "parse ms/page", "insert rows/s", "seq articles/min", "stream articles/min"]
+    print(" | ".join(f"{h:>19}" for h in headers))
+    for r in results:
+        print(" | ".join(f"{r[c]:>19.2f}" if isinstance(r[c], float) else f"{r[c]!s:>19}" for c in columns))
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="Corpus sizes (articles)")
+    parser.add_argument("--corpus", help="Recorded corpus directory (default: generate a synthetic one)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic corpus")
+    parser.add_argument("--http-latency-ms", type=float, default=0, help="Artificial latency per fixture request")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Stub LLM latency per call")
+    parser.add_argument("--llm-failure-rate", type=float, default=0, help="Fraction of stub LLM calls that fail")
+    parser.add_argument("--output", help="Append one JSON line per size to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="news-bench-") as work_dir:
+        configure_environment(work_dir, args.llm_latency_ms, args.llm_failure_rate)
+        from src.database import init_db
+        from benchmarks.fixtures import FixtureServer, generate_corpus, load_manifest, ARTICLES_PER_SITE
+
+        init_db()
+        corpus_dir = args.corpus
+        if not corpus_dir:
+            corpus_dir = os.path.join(work_dir, "corpus")
+            generate_corpus(corpus_dir, max(args.sizes), args.seed)
+        seeds = load_manifest(corpus_dir)["seeds"]
+
+        meta = {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "corpus": "synthetic" if not args.corpus else args.corpus,
+            "http_latency_ms": args.http_latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_failure_rate": args.llm_failure_rate,
+        }
+        results = []
+        with FixtureServer(corpus_dir, latency_ms=args.http_latency_ms) as server:
+            for size in sorted(args.sizes):
+                results.append(run_size(server, corpus_dir, seeds, size, ARTICLES_PER_SITE))
+        # Write buffered metrics while the throwaway DB still exists
+        from src import metrics
+        metrics.flush()
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({**meta, **r}) + "\n")
+
+if __name__ == "__main__":
+    main()
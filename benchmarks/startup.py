@@ -0,0 +1,101 @@
+"""
+Startup and per-call overhead benchmark.
+
+    python -m benchmarks.startup --repeat 5
+
+Reports the median wall time of common entry-point imports (each in a fresh interpreter)
+together with the heavy libraries they pulled in, and the per-call cost of the helpers that
+sit on the LLM hot path: settings lookups, provider lookup and Gemini model handles.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["google.generativeai", "openai", "bs4", "requests", "apscheduler"]
+
+ENTRY_POINTS = [
+    "import src.database",
+    "import src.crawler",
+    "import src.processor",
+    "import src.pipeline",
+    "import src.jobs",
+    'from src.processor import Processor; from src.llm import get_provider; Processor(get_provider("gemini"))',
+    "import main",
+]
+
+def measure_import(statement, env, repeat):
+    """Median milliseconds for `statement` in a fresh interpreter, plus the heavy modules it loaded."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules) or '-')\n"
+    )
+    timings, loaded = [], "-"
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(out[0]) * 1000)
+        loaded = out[1]
+    return statistics.median(timings), loaded
+
+def per_call_us(fn, calls):
+    fn() # Warm up: first calls load modules and fill caches
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+def measure_calls(calls):
+    from src.database import init_db, get_setting
+    from src.llm import get_provider
+    init_db()
+    results = {
+        "get_setting": per_call_us(lambda: get_setting("prompt_selection", ""), calls),
+        "get_provider": per_call_us(lambda: get_provider(), calls),
+    }
+    try:
+        gemini = get_provider("gemini")
+        model_name = gemini.model_for("analysis")
+        results["gemini_model_handle"] = per_call_us(lambda: gemini._model(model_name), calls)
+    except ImportError:
+        pass # SDK not installed
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and per-call overhead benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per import measurement")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per overhead measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="news-startup-") as work_dir:
+        # The stub keeps get_provider() offline; the dummy key only lets Gemini handles be built
+        os.environ.update({
+            "DB_PATH": os.path.join(work_dir, "startup.db"),
+            "LLM_PROVIDER": "stub",
+            "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "benchmark",
+            "METRICS_PROM_PATH": "",
+        })
+        sys.path.insert(0, PROJECT_ROOT)
+
+        print(f"{'import (median ms)':>20} | entry point")
+        for statement in ENTRY_POINTS:
+            ms, loaded = measure_import(statement, dict(os.environ), args.repeat)
+            print(f"{ms:>20.1f} | {statement}  [heavy: {loaded}]")
+
+        print(f"\n{'per call (us)':>20} | helper")
+        for name, us in measure_calls(args.calls).items():
+            print(f"{us:>20.2f} | {name}")
+
+        from src import metrics
+        metrics.flush()
+
+if __name__ == "__main__":
+    main()
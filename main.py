@@ -1,51 +1,147 @@
+import sys
 import time
+import json
 import logging
 import argparse
-from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
 from src.crawler import Crawler
 from src.processor import Processor
 from src.config import config
+from src import metrics
+from src.pipeline import StreamingPipeline
+from src.jobs import JobWorker
+from src.scheduler import get_due_urls
+from src.database import init_db, add_source, get_sources, export_processed_articles, get_export_cursor, set_export_cursor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_pipeline(urls):
+DEFAULT_URLS = ["https://news.ycombinator.com"] # Default example
+
+def resolve_urls(urls=None):
+    """Uses explicit --urls if given, otherwise the sources configured in the dashboard."""
+    if urls:
+        return urls
+    sources = [s.url for s in get_sources()]
+    if not sources:
+        logger.warning(f"No sources configured, falling back to {DEFAULT_URLS}")
+        return DEFAULT_URLS
+    return sources
+
+def run_pipeline(urls=None, streaming=False):
     logger.info("Starting pipeline run...")
+    # Resolved on every run so that sources added in the dashboard are picked up by --loop
+    urls = resolve_urls(urls)
+
+    run_id = metrics.start_run("cli")
+    try:
+        with metrics.timer("pipeline_run_seconds", mode="stream" if streaming else "sequential"):
+            if streaming:
+                StreamingPipeline(urls).run()
+            else:
+                # 1. Crawl
+                crawler = Crawler()
+                for url in urls:
+                    with metrics.timer("pipeline_stage_seconds", stage="crawl"):
+                        crawler.crawl_site(url)
+                crawler.close()
+                
+                # 2. Process & Analyze
+                processor = Processor()
+                processor.process_pending_articles()
+                processor.close()
+    finally:
+        metrics.end_run()
     
-    # 1. Crawl
-    crawler = Crawler()
-    for url in urls:
-        crawler.crawl_site(url)
-    crawler.close()
-    
-    # 2. Process & Analyze
-    processor = Processor()
-    processor.process_pending_articles()
-    processor.close()
-    
-    logger.info("Pipeline run complete.")
+    logger.info(f"Pipeline run complete ({run_id}).")
+
+def run_due_sources(streaming=False):
+    """Crawls only the sources whose adaptive schedule says they are due."""
+    urls = get_due_urls()
+    if not urls:
+        return
+    logger.info(f"{len(urls)} sources due")
+    run_pipeline(urls, streaming)
+
+def run_export(output, consumer, batch_size=500, include_content=False, from_start=False):
+    """Streams newly processed articles as JSONL and advances the consumer's high-water mark."""
+    cursor = None if from_start else get_export_cursor(consumer)
+    logger.info(f"Exporting for consumer '{consumer}' from cursor {cursor or '<start>'}")
+
+    out = sys.stdout if output == "-" else open(output, "a", encoding="utf-8")
+    count = 0
+    last_cursor = cursor
+    try:
+        for record in export_processed_articles(cursor, batch_size=batch_size, include_content=include_content):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            last_cursor = record["cursor"]
+            count += 1
+            # Checkpoint once per batch so an interrupted export resumes close to where it stopped
+            if count % batch_size == 0:
+                out.flush()
+                set_export_cursor(consumer, last_cursor)
+        out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if last_cursor and last_cursor != cursor:
+        set_export_cursor(consumer, last_cursor)
+    logger.info(f"Exported {count} articles. Cursor: {last_cursor or '<start>'}")
 
 def main():
     parser = argparse.ArgumentParser(description="Information Processing System")
-    parser.add_argument("--urls", nargs="+", help="List of URLs to crawl", default=["https://news.ycombinator.com"]) # Default example
-    parser.add_argument("--loop", action="store_true", help="Run in a loop (every hour)")
+    parser.add_argument("--urls", nargs="+", help="List of URLs to crawl (default: sources configured in the dashboard)")
+    parser.add_argument("--loop", action="store_true", help="Run continuously, visiting each source on an adaptive schedule")
+    parser.add_argument("--stream", action="store_true", default=config.PIPELINE_STREAMING,
+                        help="Overlap crawling, selection and analysis instead of running them one after another")
+    parser.add_argument("--worker", action="store_true", help="Run a background job worker for dashboard-queued fetches")
+    parser.add_argument("--export", metavar="PATH", help="Append newly processed articles as JSONL to PATH ('-' for stdout) and exit")
+    parser.add_argument("--consumer", default="default", help="Name under which the export high-water mark is stored")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows fetched per batch during export")
+    parser.add_argument("--with-content", action="store_true", help="Include the full article text in the export")
+    parser.add_argument("--from-start", action="store_true", help="Ignore the stored cursor and export everything")
     
     args = parser.parse_args()
+    init_db()
+
+    if args.export:
+        run_export(args.export, args.consumer, args.batch_size, args.with_content, args.from_start)
+        return
+
+    if args.worker:
+        worker = JobWorker()
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            worker.stop()
+        return
     
     if args.loop:
+        # Explicit URLs become sources so they get their own adaptive schedule
+        for url in args.urls or []:
+            add_source(url)
+        if not get_sources():
+            for url in DEFAULT_URLS:
+                add_source(url)
+
+        # Only --loop needs APScheduler, so one-off runs and exports skip importing it
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        # Each source is visited on its own schedule; the tick only checks which ones are due
         scheduler = BackgroundScheduler()
-        scheduler.add_job(run_pipeline, 'interval', hours=1, args=[args.urls])
+        # First tick runs immediately; max_instances=1 keeps a slow run from overlapping the next tick
+        scheduler.add_job(run_due_sources, 'interval', seconds=config.SCHEDULER_TICK_SECONDS, args=[args.stream],
+                          max_instances=1, coalesce=True, next_run_time=datetime.now())
         scheduler.start()
         logger.info("Scheduler started. Press Ctrl+C to exit.")
         try:
-            # Run once immediately
-            run_pipeline(args.urls)
             while True:
                 time.sleep(1)
         except KeyboardInterrupt:
             scheduler.shutdown()
     else:
-        run_pipeline(args.urls)
+        run_pipeline(args.urls, args.stream)
 
 if __name__ == "__main__":
     main()
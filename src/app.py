@@ -8,21 +8,44 @@ from datetime import datetime, timedelta
 # Add project root to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.database import get_db, Article, SessionLocal, delete_article, add_source, delete_source, get_sources, get_all_articles, get_setting, set_setting
-from src.crawler import Crawler
-from src.processor import Processor
+from src.database import init_db, get_db, Article, SessionLocal, delete_article, add_source, delete_source, get_sources, get_all_articles, get_high_value_articles, get_digest_days, get_daily_digest, get_setting, set_setting
+from src.processor import DEFAULT_SELECTION_PROMPT, DEFAULT_ANALYSIS_PROMPT
+from src.jobs import JobWorker, enqueue_fetch_job, get_recent_jobs, JOB_ACTIVE_STATUSES
+from src.config import config
+from src.metrics import latency_summary, run_summary
 
 st.set_page_config(page_title="Info Stream", layout="wide")
 
+@st.cache_resource
+def setup_db():
+    """Creates/migrates the schema once per server process instead of on every rerun."""
+    init_db()
+
+setup_db()
+
 def get_data():
-    db: Session = SessionLocal()
-    # Fetch high value articles
-    articles = db.query(Article).filter(Article.is_high_value == True).order_by(Article.fetched_at.desc()).all()
-    db.close()
-    return articles
+    # Fetch high value articles (cached until the data version changes)
+    return get_high_value_articles()
+
+@st.cache_resource
+def start_job_worker():
+    """One background worker per server process, so runs survive browser refreshes."""
+    return JobWorker().start()
+
+if config.JOB_INPROCESS_WORKER:
+    start_job_worker()
+
+@st.cache_data(ttl=30)
+def load_latency_summary(hours):
+    # All tabs render on every rerun, so keep the metrics scan off the hot path
+    return latency_summary(datetime.utcnow() - timedelta(hours=hours))
+
+@st.cache_data(ttl=30)
+def load_run_summary(hours):
+    return run_summary(datetime.utcnow() - timedelta(hours=hours))
 
 def run_fetch_cycle():
-    """Runs the crawler and processor."""
+    """Queues a crawl+analyze job for the configured sources."""
     sources = get_sources()
     urls = [s.url for s in sources]
     
@@ -30,27 +53,36 @@ def run_fetch_cycle():
         st.warning("No sources configured! Add some URLs in the sidebar.")
         return
 
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    # 1. Crawl
-    status_text.text("🕷️ Crawling sources...")
-    crawler = Crawler()
-    total_urls = len(urls)
-    for i, url in enumerate(urls):
-        crawler.crawl_site(url)
-        progress_bar.progress((i + 1) / (total_urls * 2))
-    crawler.close()
-    
-    # 2. Process
-    status_text.text("🧠 Analyzing content...")
-    processor = Processor()
-    processor.process_pending_articles()
-    processor.close()
-    progress_bar.progress(100)
-    
-    status_text.text("✅ Done!")
-    st.rerun()
+    job, created = enqueue_fetch_job(urls)
+    if created:
+        st.sidebar.success(f"Job #{job.id} queued.")
+    else:
+        st.sidebar.info(f"Job #{job.id} for these sources is already {job.status}.")
+
+@st.fragment(run_every=3)
+def show_job_status():
+    """Polls the latest job (a single-row query) without rerunning the whole page."""
+    jobs = get_recent_jobs(limit=1)
+    if not jobs:
+        return
+    job = jobs[0]
+
+    if job.status in JOB_ACTIVE_STATUSES:
+        stage_labels = {"crawl": "🕷️ Crawling sources...", "select": "🎯 Selecting articles...", "analyze": "🧠 Analyzing content...", "stream": "🌊 Crawling & analyzing..."}
+        st.caption(f"Job #{job.id}: {stage_labels.get(job.stage, '⏳ Queued')}")
+        if job.stage in ("analyze", "stream") and job.selected:
+            st.progress(min(job.analyzed / job.selected, 1.0))
+    elif job.status == "done":
+        st.caption(f"✅ Job #{job.id} done")
+    else:
+        st.caption(f"❌ Job #{job.id} failed: {job.error}")
+    st.caption(f"Crawled {job.crawled} · Selected {job.selected} · Analyzed {job.analyzed}")
+
+    # Refresh the whole page once when a job finishes so the new articles show up
+    previous = st.session_state.get("job_status")
+    st.session_state["job_status"] = (job.id, job.status)
+    if previous and previous[0] == job.id and previous[1] in JOB_ACTIVE_STATUSES and job.status not in JOB_ACTIVE_STATUSES:
+        st.rerun(scope="app")
 
 def main():
     st.title("🌊 Information Stream & Analysis")
@@ -79,6 +111,8 @@ def main():
     st.sidebar.markdown("---")
     if st.sidebar.button("🚀 Fetch New Data", type="primary"):
         run_fetch_cycle()
+    with st.sidebar:
+        show_job_status()
 
     if st.sidebar.button("Refresh View"):
         st.rerun()
@@ -133,108 +167,111 @@ def main():
 
     with tab2:
         st.header("Daily Summary")
-        # Filter for last 24 hours
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        recent_articles = [a for a in articles if a.fetched_at >= yesterday]
+        # Digests are precomputed as articles finish Stage 3, so any day is a single-row read
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        days = get_digest_days()
+        if today not in days:
+            days = [today] + days
+        day = st.selectbox("Day (UTC)", days, index=0)
+        digest = get_daily_digest(day)
         
-        if not recent_articles:
-            st.write("No articles in the last 24 hours.")
+        if not digest or not digest.high_value_count:
+            st.write(f"No high-value articles for {day}.")
+            if digest:
+                st.caption(f"{digest.processed_count} articles processed.")
         else:
-            st.write(f"**Total Articles**: {len(recent_articles)}")
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("High Value", digest.high_value_count)
+            c2.metric("Processed", digest.processed_count)
+            c3.metric("💰 Bonus", digest.bonus_count)
+            c4.metric("🚨 Crackdown", digest.crackdown_count)
             st.markdown("---")
-            for article in recent_articles:
-                st.subheader(article.title)
-                st.markdown(article.analysis_report or "No analysis available.")
-                st.markdown("---")
+            st.markdown(digest.summary)
 
     with tab3:
         st.header("🛠️ Developer Dashboard")
-        
-        # --- Prompt Editor ---
-        with st.expander("📝 Prompt Configuration", expanded=False):
-            st.info("💡 **提示**：请专注于修改筛选标准、角色设定和分析维度。**不需要**在 Prompt 中指定输出格式（如 JSON），系统会自动接管格式控制。")
-            st.info("Edit the prompts used by the AI. Use `{articles_list}` in Selection and `{content}` in Analysis as placeholders.")
+        dev_tab, perf_tab = st.tabs(["🗄️ Data & Prompts", "📈 Performance"])
+
+        with dev_tab:
+            # --- Prompt Editor ---
+            with st.expander("📝 Prompt Configuration", expanded=False):
+                st.info("💡 **提示**：请专注于修改筛选标准、角色设定和分析维度。**不需要**在 Prompt 中指定输出格式（如 JSON），系统会自动接管格式控制。")
+                st.info("Edit the prompts used by the AI. Use `{articles_list}` in Selection and `{content}` in Analysis as placeholders.")
             
-            # Default Prompts (Same as in processor.py, for initial display if DB is empty)
-            default_selection = """Role: 宏观红利狙击手
-Context: 只有能改变社会资源分配规则的新闻才值得关注
-Criteria: 
-1. 是否涉及[税收/社保/户籍]等顶层设计变动？(政策红利/黑天鹅) 
-2. 是否出现跨阶层的[造富/返贫]现象？(风口预警) 
-3. 是否改变了[特定行业]的准入门槛？(竞争壁垒) 
-
-Task:
-Review the following articles. Select the TOP 5 most impactful articles based on the criteria.
-Rank them from 1 (most impactful) to 5.
-
-Articles:
-{articles_list}
-"""
-            default_analysis = """Role: 冷酷的政策套利分析师
-Task: Analyze the text.
-
-Content:
-{content} 
-
-Requirements:
-1. 【矛盾点】(contradictions): 提取文中“既要...又要...”的内容，并判断哪一个是当前的真实KPI（排在后面或有量化指标的）。
-2. 【温差】(temperature_diff): 对比该行业去年的常规表述，提取变化的形容词（如从“大力发展”变为“规范有序”）。
-3. 【负面清单】(negative_list): 提取所有“严禁”、“不得”、“清理”后面的具体行为。
-4. 【实体信息】(entities): 提取文中所有的金额、日期、负责部门。
-5. 【一句话结论】(conclusion): 这文件是发钱的（红利），还是收网的（整顿）？
-"""
-
-            current_selection = get_setting("prompt_selection", default_selection)
-            current_analysis = get_setting("prompt_analysis", default_analysis)
+                current_selection = get_setting("prompt_selection", DEFAULT_SELECTION_PROMPT)
+                current_analysis = get_setting("prompt_analysis", DEFAULT_ANALYSIS_PROMPT)
             
-            new_selection = st.text_area("Selection Prompt (Stage 2)", value=current_selection, height=300)
-            new_analysis = st.text_area("Analysis Prompt (Stage 3)", value=current_analysis, height=300)
+                new_selection = st.text_area("Selection Prompt (Stage 2)", value=current_selection, height=300)
+                new_analysis = st.text_area("Analysis Prompt (Stage 3)", value=current_analysis, height=300)
             
-            if st.button("Save Prompts"):
-                set_setting("prompt_selection", new_selection)
-                set_setting("prompt_analysis", new_analysis)
-                st.success("Prompts updated!")
+                if st.button("Save Prompts"):
+                    set_setting("prompt_selection", new_selection)
+                    set_setting("prompt_analysis", new_analysis)
+                    st.success("Prompts updated!")
 
-        st.divider()
+            st.divider()
         
-        st.subheader("Database View")
-        all_articles = get_all_articles()
+            st.subheader("Database View")
+            all_articles = get_all_articles()
         
-        # Metrics
-        total = len(all_articles)
-        processed = sum(1 for a in all_articles if a.is_processed)
-        high_value = sum(1 for a in all_articles if a.is_high_value)
+            # Metrics
+            total = len(all_articles)
+            processed = sum(1 for a in all_articles if a.is_processed)
+            high_value = sum(1 for a in all_articles if a.is_high_value)
         
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Total Articles", total)
-        m2.metric("Processed", processed)
-        m3.metric("High Value", high_value)
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Total Articles", total)
+            m2.metric("Processed", processed)
+            m3.metric("High Value", high_value)
         
-        st.divider()
+            st.divider()
         
-        # Data Table
-        if all_articles:
-            data = [{
-                "ID": a.id,
-                "Title": a.title,
-                "URL": a.url,
-                "Fetched": a.fetched_at,
-                "Processed": a.is_processed,
-                "High Value": a.is_high_value
-            } for a in all_articles]
-            st.dataframe(pd.DataFrame(data), use_container_width=True)
+            # Data Table
+            if all_articles:
+                data = [{
+                    "ID": a.id,
+                    "Title": a.title,
+                    "URL": a.url,
+                    "Fetched": a.fetched_at,
+                    "Processed": a.is_processed,
+                    "High Value": a.is_high_value
+                } for a in all_articles]
+                st.dataframe(pd.DataFrame(data), use_container_width=True)
         
-        st.divider()
+            st.divider()
         
-        # Delete Action
-        st.subheader("Danger Zone")
-        del_id = st.number_input("Enter Article ID to Delete", min_value=1, step=1)
-        if st.button("Delete Article by ID", type="primary"):
-            if delete_article(del_id):
-                st.success(f"Deleted Article {del_id}")
-                st.rerun()
+            # Delete Action
+            st.subheader("Danger Zone")
+            del_id = st.number_input("Enter Article ID to Delete", min_value=1, step=1)
+            if st.button("Delete Article by ID", type="primary"):
+                if delete_article(del_id):
+                    st.success(f"Deleted Article {del_id}")
+                    st.rerun()
+                else:
+                    st.error(f"Article {del_id} not found.")
+
+        with perf_tab:
+            hours = st.selectbox("Window", [1, 6, 24, 168], index=2, format_func=lambda h: f"Last {h}h")
+
+            st.subheader("Latency (seconds)")
+            latency = load_latency_summary(hours)
+            if not latency:
+                st.info("No metrics recorded yet. Run a fetch to collect timings.")
             else:
-                st.error(f"Article {del_id} not found.")
+                df = pd.DataFrame(latency).round(3)
+                st.dataframe(df, use_container_width=True)
+
+            st.subheader("Cost per Run")
+            runs = load_run_summary(hours)
+            if runs:
+                df = pd.DataFrame(runs)
+                df["cost_usd"] = df["cost_usd"].round(4)
+                st.dataframe(df, use_container_width=True)
+                st.metric("Total Cost (USD)", f"{df['cost_usd'].sum():.4f}")
+            else:
+                st.write("No runs in this window.")
+
+            st.caption(f"Prometheus text format: `python -m src.metrics` or the textfile at `{config.METRICS_PROM_PATH}`.")
 
 if __name__ == "__main__":
     main()
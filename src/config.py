@@ -7,19 +7,66 @@ class Config:
     # LLM Settings
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai") # openai or gemini
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini") # gemini, openai or stub (offline, deterministic)
+
+    # Stub provider (benchmarks / offline runs)
+    STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+    STUB_LLM_FAILURE_RATE = float(os.getenv("STUB_LLM_FAILURE_RATE", "0")) # 0.0 - 1.0
 
     # Crawler Settings
     USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"
     
     # Application Settings
-    DB_PATH = os.path.join("data", "info_system.db")
+    DB_PATH = os.getenv("DB_PATH", os.path.join("data", "info_system.db")) # Relative to the project root
+    SETTINGS_CACHE_SECONDS = float(os.getenv("SETTINGS_CACHE_SECONDS", "5")) # Max delay before settings saved by another process are seen
     
     # Keywords for high value filtering (comma separated in env)
     HIGH_VALUE_KEYWORDS = os.getenv("HIGH_VALUE_KEYWORDS", "AI,LLM,Agent,Python,Automation").split(",")
 
+    # Background Jobs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1")) # Parallel fetch jobs per worker process
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    JOB_INPROCESS_WORKER = os.getenv("JOB_INPROCESS_WORKER", "true").lower() == "true" # Run jobs inside the Streamlit server
+    JOB_STALE_MINUTES = int(os.getenv("JOB_STALE_MINUTES", "10")) # Running jobs without a heartbeat this long are failed
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30")) # How often a running job refreshes its heartbeat
+    ARTICLE_CLAIM_MINUTES = int(os.getenv("ARTICLE_CLAIM_MINUTES", "30")) # Unfinished articles claimed longer ago are taken over by the next run
+
+    # Streaming Pipeline (crawl -> select -> analyze connected by bounded queues)
+    PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "false").lower() == "true" # Default mode for jobs and main.py
+    PIPELINE_CRAWL_WORKERS = int(os.getenv("PIPELINE_CRAWL_WORKERS", "4"))
+    PIPELINE_ANALYSIS_WORKERS = int(os.getenv("PIPELINE_ANALYSIS_WORKERS", "2"))
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+    PIPELINE_SELECT_BATCH = int(os.getenv("PIPELINE_SELECT_BATCH", "20")) # Titles per Stage-2 call
+
+    # Adaptive Source Scheduling (main.py --loop)
+    SCHEDULER_TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", "60")) # How often due sources are checked
+    SOURCE_INTERVAL_MIN_MINUTES = float(os.getenv("SOURCE_INTERVAL_MIN_MINUTES", "10"))
+    SOURCE_INTERVAL_MAX_MINUTES = float(os.getenv("SOURCE_INTERVAL_MAX_MINUTES", "1440"))
+    SOURCE_INTERVAL_DEFAULT_MINUTES = float(os.getenv("SOURCE_INTERVAL_DEFAULT_MINUTES", "60"))
+    SOURCE_BACKOFF_FACTOR = float(os.getenv("SOURCE_BACKOFF_FACTOR", "1.5")) # Applied when a visit finds nothing new
+    SOURCE_BURST_ARTICLES = int(os.getenv("SOURCE_BURST_ARTICLES", "3")) # New articles in one visit that count as a burst
+    SOURCE_JITTER = float(os.getenv("SOURCE_JITTER", "0.1")) # +/- fraction applied to each interval
+
+    # Metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "30")) # Background write interval for aggregated metrics
+    METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", os.path.join("data", "metrics.prom")) # Prometheus textfile, rewritten by the background flush
+    METRICS_WINDOW_HOURS = int(os.getenv("METRICS_WINDOW_HOURS", "24")) # Window for latency percentiles
+    METRICS_RETENTION_DAYS = int(os.getenv("METRICS_RETENTION_DAYS", "30"))
+
     # Model Configuration
     MODEL_SELECTION = "gemini-2.5-flash-lite-preview-09-2025" 
     MODEL_ANALYSIS = "gemini-2.5-flash-preview-09-2025"
 
+    OPENAI_MODEL_SELECTION = os.getenv("OPENAI_MODEL_SELECTION", "gpt-4o-mini")
+    OPENAI_MODEL_ANALYSIS = os.getenv("OPENAI_MODEL_ANALYSIS", "gpt-4o")
+
+    # USD per 1M tokens (prompt, completion), used for cost-per-run estimates
+    LLM_PRICES = {
+        MODEL_SELECTION: (0.10, 0.40),
+        MODEL_ANALYSIS: (0.30, 2.50),
+        OPENAI_MODEL_SELECTION: (0.15, 0.60),
+        OPENAI_MODEL_ANALYSIS: (2.50, 10.00),
+    }
+
 config = Config()
@@ -1,11 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import logging
 from sqlalchemy.orm import Session
-from .database import Article, get_db, SessionLocal
+from .database import Article, get_db, SessionLocal, bump_data_version
 from .config import config
+from .scheduler import record_visit
+from . import metrics
+
+# Note: requests and bs4 are imported in fetch_page, so importing the crawler (e.g. via the pipeline) stays cheap
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,23 +19,32 @@ class Crawler:
 
     def fetch_page(self, url):
         """Fetches a single page and returns the soup object."""
+        import requests
+        from bs4 import BeautifulSoup
+        host = urlparse(url).netloc
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            with metrics.timer("crawl_fetch_seconds", host=host):
+                response = requests.get(url, headers=self.headers, timeout=10)
+                response.raise_for_status()
+            with metrics.timer("crawl_html_parse_seconds", host=host):
+                soup = BeautifulSoup(response.content, 'html.parser')
+            metrics.inc("crawl_pages_total", host=host, status="ok")
+            return soup
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
+            metrics.inc("crawl_pages_total", host=host, status="error")
             return None
 
     def is_new_url(self, url):
         """Checks if the URL already exists in the database."""
-        return self.db.query(Article).filter(Article.url == url).first() is None
+        with metrics.timer("db_query_seconds", op="is_new_url"):
+            return self.db.query(Article).filter(Article.url == url).first() is None
 
     def save_article(self, url, title, content):
-        """Saves a new article to the database."""
+        """Saves a new article to the database. Returns its ID, or None if nothing was saved."""
         if not title or not content:
             logger.warning(f"Skipping {url}: Missing title or content")
-            return
+            return None
 
         try:
             article = Article(
@@ -42,12 +53,16 @@ class Crawler:
                 content=content,
                 fetched_at=datetime.utcnow()
             )
-            self.db.add(article)
-            self.db.commit()
+            with metrics.timer("db_write_seconds", op="save_article"):
+                self.db.add(article)
+                bump_data_version(self.db)
+                self.db.commit()
             logger.info(f"Saved article: {title}")
+            return article.id
         except Exception as e:
             logger.error(f"Error saving article {url}: {e}")
             self.db.rollback()
+            return None
 
     def parse_article(self, url, soup):
         """
@@ -104,39 +119,54 @@ class Crawler:
                     
         return links
 
-    def crawl_site(self, seed_url):
-        """Crawls the seed URL for links and processes them."""
+    def crawl_site(self, seed_url, on_article=None):
+        """
+        Crawls the seed URL for links and processes them. Returns the number of articles saved.
+        `on_article(article_id)` is called as soon as each article is saved, if given.
+        """
         logger.info(f"Crawling seed: {seed_url}")
         soup = self.fetch_page(seed_url)
         if not soup:
-            return
+            record_visit(self.db, seed_url, 0, ok=False)
+            return 0
 
         links = self.get_links(seed_url, soup)
         logger.info(f"Found {len(links)} potential links on {seed_url}")
         
         count = 0
+        saved = 0
         for link in links:
             if count >= 5: # Limit to 5 articles per run for testing
                 break
             if self.is_new_url(link):
-                self.process_url(link)
+                article_id = self.process_url(link)
+                if article_id:
+                    saved += 1
+                    if on_article:
+                        on_article(article_id)
                 count += 1
+        metrics.inc("crawl_articles_saved_total", saved, host=urlparse(seed_url).netloc)
+        # Feeds the adaptive schedule of configured sources
+        record_visit(self.db, seed_url, saved)
+        return saved
 
     def process_url(self, url):
-        """Main entry point to process a single article URL."""
+        """Main entry point to process a single article URL. Returns the saved article's ID, or None."""
         if not self.is_new_url(url):
             logger.info(f"URL already exists: {url}")
-            return
+            return None
 
         logger.info(f"Processing: {url}")
         soup = self.fetch_page(url)
         if soup:
-            title, content = self.parse_article(url, soup)
+            with metrics.timer("crawl_extract_seconds", host=urlparse(url).netloc):
+                title, content = self.parse_article(url, soup)
             # Only save if it looks like a real article (has substantial content)
             if title and content and len(content) > 100:
-                self.save_article(url, title, content)
+                return self.save_article(url, title, content)
             else:
                 logger.info(f"Skipped {url}: Content too short or no title")
+        return None
 
     def close(self):
         self.db.close()
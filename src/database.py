@@ -1,8 +1,18 @@
 import os
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+import json
+import time
+import logging
+import threading
+import functools
+from . import metrics
+from .config import config
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, Column, Integer, Float, String, Text, DateTime, Boolean, Index, inspect, text, or_, and_, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 class Article(Base):
@@ -17,10 +27,17 @@ class Article(Base):
     # Processing status
     is_processed = Column(Boolean, default=False)
     is_high_value = Column(Boolean, default=False)
+    # Set once the pipeline is done with the article (after Stage 3 for high-value ones)
+    processed_at = Column(DateTime, nullable=True, index=True)
+    # Assigned together with processed_at in commit order; the export high-water mark (see mark_processed)
+    export_seq = Column(Integer, nullable=True, index=True)
+    # When a run claimed the article for Stage 2/3; older claims count as abandoned (see recover_unfinished)
+    claimed_at = Column(DateTime, nullable=True)
     
     # Analysis results
     summary = Column(Text, nullable=True)
     analysis_report = Column(Text, nullable=True)
+    analysis_data = Column(Text, nullable=True) # JSON: {"selection": {...}, "analysis": {...}}
     
     def __repr__(self):
         return f"<Article(title='{self.title}', url='{self.url}')>"
@@ -32,24 +49,140 @@ class Source(Base):
     url = Column(String, unique=True, nullable=False)
     added_at = Column(DateTime, default=datetime.utcnow)
 
+    # Adaptive crawl scheduling (see scheduler.py)
+    last_crawled_at = Column(DateTime, nullable=True)
+    last_changed_at = Column(DateTime, nullable=True) # Last visit that found new articles
+    change_gap_minutes = Column(Float, nullable=True) # EWMA of the time between changes
+    crawl_interval_minutes = Column(Float, nullable=True)
+    next_crawl_at = Column(DateTime, nullable=True, index=True) # NULL means due now
+
 class Settings(Base):
     __tablename__ = 'settings'
     
     key = Column(String, primary_key=True)
     value = Column(Text, nullable=True)
 
+class DailyDigest(Base):
+    __tablename__ = 'daily_digests'
+
+    day = Column(String, primary_key=True) # YYYY-MM-DD of processed_at (UTC)
+    processed_count = Column(Integer, default=0) # Articles the pipeline finished that day
+    high_value_count = Column(Integer, default=0)
+
+    # High-value articles by Stage-3 conclusion
+    bonus_count = Column(Integer, default=0) # 发钱 / 红利
+    crackdown_count = Column(Integer, default=0) # 收网 / 整顿
+    other_count = Column(Integer, default=0)
+
+    summary = Column(Text, default="") # Rendered reports, newest first
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class Metric(Base):
+    __tablename__ = 'metrics'
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String, nullable=True, index=True) # Pipeline run / job the observation belongs to
+    name = Column(String, nullable=False, index=True) # *_seconds are timings, *_total are counters
+    labels = Column(Text, default="{}") # JSON, sorted keys
+    # Each row aggregates the observations of one series between two flushes (see metrics.flush)
+    value = Column(Float, nullable=False) # Sum of the observations
+    samples = Column(Integer, default=1) # Number of observations
+    buckets = Column(Text, nullable=True) # JSON histogram counts for *_seconds (bounds in metrics.BUCKETS)
+    recorded_at = Column(DateTime, default=datetime.utcnow, index=True) # First observation
+
+JOB_ACTIVE_STATUSES = ("queued", "running")
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, default="fetch", nullable=False)
+    source_key = Column(String, nullable=False) # Hash of the sorted source URLs
+    urls = Column(Text, nullable=False) # JSON list
+    status = Column(String, default="queued", nullable=False, index=True) # queued / running / done / failed
+    stage = Column(String, nullable=True) # crawl / select / analyze
+
+    # Progress counters
+    crawled = Column(Integer, default=0)
+    selected = Column(Integer, default=0)
+    analyzed = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow) # Heartbeat while running
+
+    __table_args__ = (
+        # At most one queued/running job per source set
+        Index("uq_jobs_active_source", "source_key", unique=True,
+              sqlite_where=text("status IN ('queued', 'running')")),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, status='{self.status}', stage='{self.stage}')>"
+
 # Database Setup
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'info_system.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config.DB_PATH)
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 engine = create_engine(DATABASE_URL)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    # WAL lets the dashboard keep reading while a background job writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Columns added after the initial schema: (table, column, DDL type, backfill SQL or None)
+MIGRATIONS = [
+    ("articles", "processed_at", "DATETIME", "UPDATE articles SET processed_at = fetched_at WHERE is_processed = 1"),
+    ("articles", "analysis_data", "TEXT", None),
+    ("articles", "export_seq", "INTEGER",
+     "UPDATE articles SET export_seq = ranked.seq FROM ("
+     "SELECT id, ROW_NUMBER() OVER (ORDER BY processed_at, id) AS seq FROM articles WHERE processed_at IS NOT NULL"
+     ") AS ranked WHERE articles.id = ranked.id"),
+    ("articles", "claimed_at", "DATETIME", None),
+    ("metrics", "samples", "INTEGER", "UPDATE metrics SET samples = 1"),
+    ("metrics", "buckets", "TEXT", None),
+    ("sources", "last_crawled_at", "DATETIME", None),
+    ("sources", "last_changed_at", "DATETIME", None),
+    ("sources", "change_gap_minutes", "FLOAT", None),
+    ("sources", "crawl_interval_minutes", "FLOAT", None),
+    ("sources", "next_crawl_at", "DATETIME", None),
+]
+
+def migrate_db():
+    """Adds missing columns to tables created by an older version."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, column, ddl, backfill in MIGRATIONS:
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column in existing:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            if backfill:
+                conn.execute(text(backfill))
+            logger.info(f"Migrated {table}: added column {column}")
+
 def init_db():
     """Initialize the database tables."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     Base.metadata.create_all(bind=engine)
-    print(f"Database initialized at {DB_PATH}")
+    migrate_db()
+    db = SessionLocal()
+    try:
+        # Rebuild digests for databases created before the digest table existed or while it was keyed by fetch day
+        if not db.get(Settings, DIGEST_DAY_KEY):
+            rebuild_daily_digests(db)
+            db.add(Settings(key=DIGEST_DAY_KEY, value="processed_at"))
+            bump_data_version(db)
+            db.commit()
+    finally:
+        db.close()
+    logger.info(f"Database initialized at {DB_PATH}")
 
 def get_db():
     """Dependency for getting DB session."""
@@ -59,17 +192,189 @@ def get_db():
     finally:
         db.close()
 
+DATA_VERSION_KEY = "data_version"
+
+def bump_data_version(db):
+    """
+    Increments the data version inside the caller's transaction.
+    Every write that changes what the dashboard shows must call this before committing,
+    so cached reads (see `cached_read`) in any process notice the change.
+    """
+    db.execute(
+        text("INSERT INTO settings (key, value) VALUES (:key, '1') "
+             "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"),
+        {"key": DATA_VERSION_KEY}
+    )
+
+EXPORT_SEQ_KEY = "export_seq"
+
+def claim_for_selection(db, ids):
+    """
+    Marks unprocessed articles as taken for Stage 2 and commits, before any LLM call.
+    Returns the IDs this caller claimed; articles another processor got first are left out,
+    so overlapping runs never select (or later analyze) the same article twice.
+    """
+    if not ids:
+        return set()
+    rows = db.execute(
+        update(Article)
+        .where(Article.id.in_(ids), Article.is_processed == False)
+        .values(is_processed=True, claimed_at=datetime.utcnow())
+        .returning(Article.id)
+    ).all()
+    db.commit()
+    return {article_id for (article_id,) in rows}
+
+def release_selection(db, ids):
+    """Hands claimed articles whose Stage 2 failed back to the next run."""
+    db.execute(
+        update(Article)
+        .where(Article.id.in_(ids), Article.processed_at.is_(None), Article.is_high_value == False)
+        .values(is_processed=False, claimed_at=None)
+    )
+    db.commit()
+
+def release_claims(db, ids):
+    """Drops the claim on selected articles this run will not analyze after all, so the next run recovers them at once."""
+    if not ids:
+        return
+    db.execute(
+        update(Article)
+        .where(Article.id.in_(ids), Article.processed_at.is_(None))
+        .values(claimed_at=None)
+    )
+    db.commit()
+
+def recover_unfinished(db):
+    """
+    Takes over articles an earlier run claimed but never finished, e.g. because it was stopped, failed,
+    or died between Stage 2 and Stage 3. Released claims and claims older than ARTICLE_CLAIM_MINUTES
+    count as abandoned; fresher ones may belong to a run that is still going.
+    Abandoned unselected articles go back to Stage 2. Abandoned selected ones are re-claimed,
+    and their IDs are returned for Stage 3.
+    """
+    now = datetime.utcnow()
+    abandoned = and_(
+        Article.is_processed == True,
+        Article.processed_at.is_(None),
+        or_(Article.claimed_at.is_(None), Article.claimed_at < now - timedelta(minutes=config.ARTICLE_CLAIM_MINUTES)),
+    )
+    db.execute(
+        update(Article)
+        .where(abandoned, Article.is_high_value == False)
+        .values(is_processed=False, claimed_at=None)
+    )
+    rows = db.execute(
+        update(Article)
+        .where(abandoned, Article.is_high_value == True)
+        .values(claimed_at=now)
+        .returning(Article.id)
+    ).all()
+    db.commit()
+    return sorted(article_id for (article_id,) in rows)
+
+def mark_processed(db, article: "Article"):
+    """
+    Stamps `article` as finished and gives it the next export sequence number, inside the caller's transaction.
+    Returns False (and changes nothing) if it was already finished, so callers fold it into the digest only once.
+
+    The counter is written in the same transaction and SQLite allows one writer at a time, so sequence numbers
+    follow commit order. A processed_at timestamp does not: it is taken before the commit, so a slow writer
+    could commit a row below a cursor that an export has already passed.
+    """
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(Article)
+        .where(Article.id == article.id, Article.processed_at.is_(None))
+        .values(processed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != 1:
+        return False
+    # Starts from the highest existing number the first time (e.g. after the export_seq backfill)
+    db.execute(
+        text("INSERT INTO settings (key, value) SELECT :key, COALESCE(MAX(export_seq), 0) + 1 FROM articles WHERE true "
+             "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"),
+        {"key": EXPORT_SEQ_KEY}
+    )
+    article.export_seq = int(db.execute(
+        text("SELECT value FROM settings WHERE key = :key"), {"key": EXPORT_SEQ_KEY}
+    ).scalar())
+    article.processed_at = now
+    return True
+
+def get_data_version():
+    """Returns the current data version (a single primary-key lookup)."""
+    with engine.connect() as conn:
+        value = conn.execute(
+            text("SELECT value FROM settings WHERE key = :key"), {"key": DATA_VERSION_KEY}
+        ).scalar()
+    return int(value) if value else 0
+
+def cached_read(func):
+    """
+    Caches a read helper's result per argument tuple until the data version changes.
+    Returned ORM objects are detached and shared between callers, so treat them as read-only.
+    """
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = args + tuple(sorted(kwargs.items()))
+        # Read the version first: a write racing with `func` then only causes one extra reload
+        version = get_data_version()
+        hit = cache.get(key)
+        if hit and hit[0] == version:
+            metrics.inc("db_cache_total", fn=func.__name__, result="hit")
+            return hit[1]
+        metrics.inc("db_cache_total", fn=func.__name__, result="miss")
+        with metrics.timer("db_query_seconds", op=func.__name__):
+            value = func(*args, **kwargs)
+        cache[key] = (version, value)
+        return value
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+_settings_snapshot = None # (data version, {key: value})
+_settings_checked_at = 0.0
+_settings_lock = threading.Lock()
+
+def _load_settings():
+    """
+    Returns all settings as a dict held in memory.
+    The data version is re-checked at most every SETTINGS_CACHE_SECONDS, so writes from other
+    processes show up within that time; `set_setting` in this process drops the snapshot immediately.
+    """
+    global _settings_snapshot, _settings_checked_at
+    with _settings_lock:
+        now = time.monotonic()
+        if _settings_snapshot and now - _settings_checked_at < config.SETTINGS_CACHE_SECONDS:
+            # Not counted: recording a metric would cost more than the lookup itself
+            return _settings_snapshot[1]
+        version = get_data_version()
+        _settings_checked_at = now
+        if _settings_snapshot and _settings_snapshot[0] == version:
+            metrics.inc("db_cache_total", fn="get_setting", result="hit")
+            return _settings_snapshot[1]
+        metrics.inc("db_cache_total", fn="get_setting", result="miss")
+        with metrics.timer("db_query_seconds", op="get_setting"):
+            db = SessionLocal()
+            try:
+                values = dict(db.query(Settings.key, Settings.value).all())
+            finally:
+                db.close()
+        _settings_snapshot = (version, values)
+        return values
+
 def get_setting(key: str, default_value: str = ""):
-    """Gets a setting value."""
-    db = SessionLocal()
-    try:
-        setting = db.query(Settings).filter(Settings.key == key).first()
-        return setting.value if setting else default_value
-    finally:
-        db.close()
+    """Gets a setting value (served from the in-memory snapshot, see `_load_settings`)."""
+    value = _load_settings().get(key)
+    return default_value if value is None else value
 
 def set_setting(key: str, value: str):
     """Sets a setting value."""
+    global _settings_snapshot
     db = SessionLocal()
     try:
         setting = db.query(Settings).filter(Settings.key == key).first()
@@ -78,11 +383,15 @@ def set_setting(key: str, value: str):
         else:
             setting = Settings(key=key, value=value)
             db.add(setting)
+        bump_data_version(db)
         db.commit()
+        # Taken after the commit so a concurrent reload cannot re-cache the old value
+        with _settings_lock:
+            _settings_snapshot = None
         return True
     except Exception as e:
         db.rollback()
-        print(f"Error setting value: {e}")
+        logger.error(f"Error setting value: {e}")
         return False
     finally:
         db.close()
@@ -93,13 +402,19 @@ def delete_article(article_id: int):
     try:
         article = db.query(Article).filter(Article.id == article_id).first()
         if article:
+            # Unfinished articles are not in any digest yet
+            day = digest_day(article) if article.processed_at else None
             db.delete(article)
+            db.flush()
+            if day:
+                rebuild_daily_digests(db, day)
+            bump_data_version(db)
             db.commit()
             return True
         return False
     except Exception as e:
         db.rollback()
-        print(f"Error deleting article: {e}")
+        logger.error(f"Error deleting article: {e}")
         return False
     finally:
         db.close()
@@ -112,11 +427,12 @@ def add_source(url: str):
             return False # Already exists
         source = Source(url=url)
         db.add(source)
+        bump_data_version(db)
         db.commit()
         return True
     except Exception as e:
         db.rollback()
-        print(f"Error adding source: {e}")
+        logger.error(f"Error adding source: {e}")
         return False
     finally:
         db.close()
@@ -128,16 +444,18 @@ def delete_source(source_id: int):
         source = db.query(Source).filter(Source.id == source_id).first()
         if source:
             db.delete(source)
+            bump_data_version(db)
             db.commit()
             return True
         return False
     except Exception as e:
         db.rollback()
-        print(f"Error deleting source: {e}")
+        logger.error(f"Error deleting source: {e}")
         return False
     finally:
         db.close()
 
+@cached_read
 def get_sources():
     """Returns all sources."""
     db = SessionLocal()
@@ -146,6 +464,7 @@ def get_sources():
     finally:
         db.close()
 
+@cached_read
 def get_all_articles():
     """Returns all articles for developer view."""
     db = SessionLocal()
@@ -154,5 +473,175 @@ def get_all_articles():
     finally:
         db.close()
 
+@cached_read
+def get_high_value_articles():
+    """Returns high-value articles, newest first."""
+    db = SessionLocal()
+    try:
+        return db.query(Article).filter(Article.is_high_value == True).order_by(Article.fetched_at.desc()).all()
+    finally:
+        db.close()
+
+DIGEST_DAY_KEY = "digest_day_basis" # Marks digests as keyed by processed_at
+
+DIGEST_CATEGORY_KEYWORDS = {
+    "bonus": ("红利", "发钱"),
+    "crackdown": ("整顿", "收网"),
+}
+
+def conclusion_category(conclusion: str):
+    """Buckets a Stage-3 conclusion by whichever category keyword it mentions first."""
+    best, best_pos = "other", None
+    for category, keywords in DIGEST_CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            pos = (conclusion or "").find(keyword)
+            if pos != -1 and (best_pos is None or pos < best_pos):
+                best, best_pos = category, pos
+    return best
+
+def digest_day(article: Article):
+    """Digests are grouped by the day an article finished the pipeline, not the day it was fetched."""
+    return article.processed_at.strftime("%Y-%m-%d")
+
+def render_digest_entry(article: Article):
+    return f"### {article.title}\n\n{article.analysis_report or 'No analysis available.'}\n\n---\n\n"
+
+def add_to_daily_digest(db, article: Article, high_value: bool = False, conclusion: str = None):
+    """
+    Folds one finished article into its day's digest inside the caller's transaction.
+    Counters are incremented and the report prepended in a single upsert, so concurrent jobs can't lose updates.
+    """
+    category = conclusion_category(conclusion) if high_value else None
+    stmt = sqlite_insert(DailyDigest).values(
+        day=digest_day(article),
+        processed_count=1,
+        high_value_count=1 if high_value else 0,
+        bonus_count=1 if category == "bonus" else 0,
+        crackdown_count=1 if category == "crackdown" else 0,
+        other_count=1 if category == "other" else 0,
+        summary=render_digest_entry(article) if high_value else "",
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyDigest.day],
+        set_={
+            "processed_count": DailyDigest.processed_count + stmt.excluded.processed_count,
+            "high_value_count": DailyDigest.high_value_count + stmt.excluded.high_value_count,
+            "bonus_count": DailyDigest.bonus_count + stmt.excluded.bonus_count,
+            "crackdown_count": DailyDigest.crackdown_count + stmt.excluded.crackdown_count,
+            "other_count": DailyDigest.other_count + stmt.excluded.other_count,
+            "summary": stmt.excluded.summary + func.coalesce(DailyDigest.summary, ""),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt)
+
+def rebuild_daily_digests(db, day: str = None):
+    """Recomputes the digest for `day` (or every day) from the articles table."""
+    query = db.query(Article).filter(Article.processed_at.isnot(None))
+    digests = db.query(DailyDigest)
+    if day:
+        start = datetime.strptime(day, "%Y-%m-%d")
+        query = query.filter(Article.processed_at >= start, Article.processed_at < start + timedelta(days=1))
+        digests = digests.filter(DailyDigest.day == day)
+    digests.delete(synchronize_session=False)
+
+    for article in query.order_by(Article.processed_at, Article.id).all():
+        conclusion = None
+        if article.analysis_data:
+            conclusion = (json.loads(article.analysis_data).get("analysis") or {}).get("conclusion")
+        add_to_daily_digest(db, article, high_value=bool(article.is_high_value), conclusion=conclusion)
+
+@cached_read
+def get_digest_days():
+    """Returns the days that have a digest, newest first."""
+    db = SessionLocal()
+    try:
+        return [d for (d,) in db.query(DailyDigest.day).order_by(DailyDigest.day.desc()).all()]
+    finally:
+        db.close()
+
+@cached_read
+def get_daily_digest(day: str):
+    """Returns the precomputed digest for a day (or None)."""
+    db = SessionLocal()
+    try:
+        return db.query(DailyDigest).filter(DailyDigest.day == day).first()
+    finally:
+        db.close()
+
+def get_export_cursor(consumer: str):
+    """Returns the persisted export high-water mark for a consumer (or None)."""
+    return get_setting(f"export_cursor:{consumer}", None)
+
+def set_export_cursor(consumer: str, cursor: str):
+    """Persists the export high-water mark for a consumer."""
+    return set_setting(f"export_cursor:{consumer}", cursor)
+
+def _parse_cursor(db, cursor: str):
+    """
+    Cursor format: '<export_seq>'.
+    Older '<processed_at ISO>|<article id>' cursors map to the last row at or before that position,
+    which matches because the export_seq backfill numbers existing rows in (processed_at, id) order.
+    """
+    if "|" not in cursor:
+        return int(cursor)
+    ts, article_id = cursor.rsplit("|", 1)
+    ts = datetime.fromisoformat(ts)
+    return db.query(func.max(Article.export_seq)).filter(or_(
+        Article.processed_at < ts,
+        and_(Article.processed_at == ts, Article.id <= int(article_id))
+    )).scalar() or 0
+
+def export_processed_articles(cursor: str = None, batch_size: int = 500, include_content: bool = False):
+    """
+    Streams processed articles in export_seq (commit) order, starting after `cursor`.
+    Rows are read in keyset-paginated batches of `batch_size`, so memory stays flat regardless
+    of table size and no read transaction is held open while the consumer handles a batch.
+    Each yielded record carries the `cursor` to resume from after it has been consumed.
+    """
+    last = 0
+    if cursor:
+        db = SessionLocal()
+        try:
+            last = _parse_cursor(db, cursor)
+        finally:
+            db.close()
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(Article).filter(Article.export_seq > last)
+            with metrics.timer("db_query_seconds", op="export_batch"):
+                batch = query.order_by(Article.export_seq).limit(batch_size).all()
+            records = [_export_record(a, include_content) for a in batch]
+        finally:
+            db.close()
+
+        if not records:
+            return
+        last = batch[-1].export_seq
+        yield from records
+        if len(records) < batch_size:
+            return
+
+def _export_record(article: Article, include_content: bool = False):
+    """Converts an article into a JSON-serializable export record."""
+    record = {
+        "id": article.id,
+        "url": article.url,
+        "title": article.title,
+        "fetched_at": article.fetched_at.isoformat() if article.fetched_at else None,
+        "processed_at": article.processed_at.isoformat(),
+        "is_high_value": bool(article.is_high_value),
+        "summary": article.summary,
+        "analysis": json.loads(article.analysis_data) if article.analysis_data else None,
+        "analysis_report": article.analysis_report,
+        "cursor": str(article.export_seq),
+    }
+    if include_content:
+        record["content"] = article.content
+    return record
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     init_db()
@@ -0,0 +1,251 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from .database import Job, SessionLocal, JOB_ACTIVE_STATUSES
+from .config import config
+from . import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def source_key(urls):
+    """Identifies a source set independent of URL order."""
+    return hashlib.sha1("\n".join(sorted(set(urls))).encode("utf-8")).hexdigest()
+
+def fail_stale_jobs(db):
+    """Marks running jobs whose worker stopped sending heartbeats as failed."""
+    cutoff = datetime.utcnow() - timedelta(minutes=config.JOB_STALE_MINUTES)
+    db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.updated_at < cutoff)
+        .values(status="failed", error="Worker stopped responding", finished_at=datetime.utcnow())
+    )
+    db.commit()
+
+def enqueue_fetch_job(urls):
+    """
+    Queues a crawl+analyze run for `urls`.
+    Returns (job, created); if a run for the same source set is already active, that job is returned instead.
+    """
+    key = source_key(urls)
+    db = SessionLocal()
+    try:
+        fail_stale_jobs(db)
+        job = Job(kind="fetch", source_key=key, urls=json.dumps(sorted(set(urls))))
+        db.add(job)
+        try:
+            db.commit()
+            created = True
+        except IntegrityError:
+            # The partial unique index rejected a second active job for this source set
+            db.rollback()
+            job = db.query(Job).filter(Job.source_key == key, Job.status.in_(JOB_ACTIVE_STATUSES)).first()
+            created = False
+        if job:
+            db.refresh(job)
+            db.expunge(job)
+        return job, created
+    finally:
+        db.close()
+
+def get_job(job_id: int):
+    """Returns a job by ID (detached)."""
+    db = SessionLocal()
+    try:
+        return db.query(Job).filter(Job.id == job_id).first()
+    finally:
+        db.close()
+
+def get_recent_jobs(limit: int = 5):
+    """Returns the most recent jobs, newest first."""
+    db = SessionLocal()
+    try:
+        return db.query(Job).order_by(Job.id.desc()).limit(limit).all()
+    finally:
+        db.close()
+
+def claim_next_job():
+    """Atomically moves the oldest queued job to running. Returns its ID or None."""
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.status == "queued").order_by(Job.id).first()
+        if not job:
+            return None
+        now = datetime.utcnow()
+        # Conditional update so that two workers never claim the same job
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "queued")
+            .values(status="running", started_at=now, updated_at=now)
+        )
+        db.commit()
+        return job.id if result.rowcount == 1 else None
+    finally:
+        db.close()
+
+def update_job(job_id: int, increments: dict = None, **values):
+    """Applies counter increments and field updates to a job, refreshing its heartbeat."""
+    values["updated_at"] = datetime.utcnow()
+    for field, amount in (increments or {}).items():
+        values[field] = getattr(Job, field) + amount
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+def finish_job(job_id: int, status: str, **values):
+    """
+    Moves a running job to its final status. Returns False if the job is no longer running,
+    e.g. because `fail_stale_jobs` gave up on it; that outcome is kept rather than overwritten.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running")
+            .values(status=status, finished_at=datetime.utcnow(), updated_at=datetime.utcnow(), **values)
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+def _heartbeat(job_id: int, stop_event: threading.Event):
+    """Refreshes a running job's heartbeat, so slow sources or quiet stages don't look like a dead worker."""
+    while not stop_event.wait(config.JOB_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running")
+                .values(updated_at=datetime.utcnow())
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error refreshing heartbeat of job {job_id}: {e}")
+        finally:
+            db.close()
+
+def run_fetch_job(job_id: int):
+    """Executes a fetch job: crawl every source, then select and analyze pending articles."""
+    job = get_job(job_id)
+    urls = json.loads(job.urls)
+    logger.info(f"Running job {job_id} for {len(urls)} sources")
+    metrics.start_run(f"job{job_id}")
+    heartbeat_stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, heartbeat_stop), name=f"job{job_id}-heartbeat", daemon=True).start()
+    try:
+        with metrics.timer("pipeline_run_seconds", mode="stream" if config.PIPELINE_STREAMING else "sequential"):
+            _execute_fetch_job(job_id, urls)
+        if finish_job(job_id, "done", stage=None):
+            logger.info(f"Job {job_id} done")
+        else:
+            logger.warning(f"Job {job_id} finished, but it was no longer marked running; status left unchanged")
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        finish_job(job_id, "failed", error=str(e))
+    finally:
+        heartbeat_stop.set()
+        metrics.end_run()
+
+def _execute_fetch_job(job_id: int, urls):
+    # Imported here so that enqueueing/polling does not load the crawler and LLM stacks
+    from .crawler import Crawler
+    from .processor import Processor
+
+    if config.PIPELINE_STREAMING:
+        from .pipeline import StreamingPipeline
+        update_job(job_id, stage="stream")
+        StreamingPipeline(urls, progress_callback=lambda stage, count: update_job(job_id, {stage: count})).run()
+        return
+
+    # 1. Crawl
+    update_job(job_id, stage="crawl")
+    crawler = Crawler()
+    try:
+        for url in urls:
+            with metrics.timer("pipeline_stage_seconds", stage="crawl"):
+                saved = crawler.crawl_site(url)
+            update_job(job_id, {"crawled": saved})
+    finally:
+        crawler.close()
+
+    # 2. Select & Analyze
+    update_job(job_id, stage="select")
+    processor = Processor()
+    try:
+        def on_progress(stage, count):
+            if stage == "selected":
+                update_job(job_id, {"selected": count}, stage="analyze")
+            else:
+                update_job(job_id, {stage: count})
+        processor.process_pending_articles(progress_callback=on_progress)
+    finally:
+        processor.close()
+
+class JobWorker:
+    """Polls the jobs table and runs queued jobs on a thread pool."""
+
+    def __init__(self, max_workers: int = None, poll_seconds: float = None):
+        self.max_workers = max_workers or config.JOB_WORKERS
+        self.poll_seconds = poll_seconds or config.JOB_POLL_SECONDS
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self.slots = threading.BoundedSemaphore(self.max_workers)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Starts polling in a daemon thread (used by the Streamlit app)."""
+        self.thread = threading.Thread(target=self.run_forever, name="job-poller", daemon=True)
+        self.thread.start()
+        return self
+
+    def run_forever(self):
+        db = SessionLocal()
+        try:
+            fail_stale_jobs(db)
+        finally:
+            db.close()
+
+        logger.info(f"Job worker started ({self.max_workers} slots)")
+        while not self.stop_event.is_set():
+            # Only claim a job when a slot is free, so queued jobs stay visible as queued
+            if not self.slots.acquire(timeout=self.poll_seconds):
+                continue
+            try:
+                job_id = claim_next_job()
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job_id = None
+            if job_id is None:
+                self.slots.release()
+                self.stop_event.wait(self.poll_seconds)
+                continue
+            self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            run_fetch_job(job_id)
+        finally:
+            self.slots.release()
+
+    def stop(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+    # Standalone worker process: python -m src.jobs
+    worker = JobWorker()
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
@@ -0,0 +1,174 @@
+import re
+import json
+import time
+import typing
+import hashlib
+import logging
+import threading
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class LLMResponse:
+    """Provider-independent result of a structured generation call."""
+
+    def __init__(self, text: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.text = text
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+class LLMProvider:
+    """
+    Base class for LLM backends. The processor asks for a `role` ("selection" or "analysis");
+    each provider maps roles to its own models and returns JSON text matching `schema`.
+    """
+    name = "base"
+
+    def __init__(self, models: dict):
+        self.models = models
+
+    def model_for(self, role: str):
+        return self.models[role]
+
+    def generate_json(self, role: str, prompt: str, schema) -> LLMResponse:
+        raise NotImplementedError
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini with native response_schema enforcement.
+    The SDK is imported and configured on the first request, and model handles are reused across calls.
+    """
+    name = "gemini"
+
+    def __init__(self):
+        super().__init__({"selection": config.MODEL_SELECTION, "analysis": config.MODEL_ANALYSIS})
+        self.genai = None
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name: str):
+        with self._lock:
+            if self.genai is None:
+                # Importing the SDK takes about a second, so it is deferred until a request needs it
+                import google.generativeai as genai
+                genai.configure(api_key=config.GEMINI_API_KEY)
+                self.genai = genai
+            if model_name not in self._handles:
+                self._handles[model_name] = self.genai.GenerativeModel(model_name)
+            return self._handles[model_name]
+
+    def generate_json(self, role, prompt, schema):
+        model_name = self.model_for(role)
+        model = self._model(model_name)
+        response = model.generate_content(
+            prompt,
+            generation_config=self.genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=schema
+            )
+        )
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            response.text,
+            model_name,
+            getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
+def _schema_fields(schema):
+    """Returns (is_list, {field: type}) for a TypedDict or list[TypedDict] schema."""
+    if typing.get_origin(schema) is list:
+        return True, typing.get_type_hints(typing.get_args(schema)[0])
+    return False, typing.get_type_hints(schema)
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions in JSON mode; the schema is described in the prompt."""
+    name = "openai"
+
+    def __init__(self):
+        super().__init__({"selection": config.OPENAI_MODEL_SELECTION, "analysis": config.OPENAI_MODEL_ANALYSIS})
+        from openai import OpenAI
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+
+    def generate_json(self, role, prompt, schema):
+        model_name = self.model_for(role)
+        is_list, fields = _schema_fields(schema)
+        shape = "{" + ", ".join(f'"{name}": {t.__name__}' for name, t in fields.items()) + "}"
+        # JSON mode only allows objects at the top level, so lists are wrapped in "items"
+        if is_list:
+            instruction = f'Respond with a JSON object {{"items": [{shape}, ...]}}.'
+        else:
+            instruction = f"Respond with a JSON object {shape}."
+
+        response = self.client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": f"{prompt}\n\n{instruction}"}],
+            response_format={"type": "json_object"},
+        )
+        text = response.choices[0].message.content
+        if is_list:
+            text = json.dumps(json.loads(text).get("items", []), ensure_ascii=False)
+        usage = response.usage
+        return LLMResponse(
+            text,
+            model_name,
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+class StubLLMError(RuntimeError):
+    """Injected failure raised by StubProvider."""
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic offline provider for benchmarks and local runs.
+    The output, injected latency and injected failures depend only on the prompt, so runs are repeatable.
+    """
+    name = "stub"
+
+    def __init__(self, latency_ms: float = None, failure_rate: float = None):
+        super().__init__({"selection": "stub-selection", "analysis": "stub-analysis"})
+        self.latency_ms = config.STUB_LLM_LATENCY_MS if latency_ms is None else latency_ms
+        self.failure_rate = config.STUB_LLM_FAILURE_RATE if failure_rate is None else failure_rate
+
+    def generate_json(self, role, prompt, schema):
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if (digest % 10000) < self.failure_rate * 10000:
+            raise StubLLMError(f"Injected stub failure ({role})")
+
+        is_list, fields = _schema_fields(schema)
+        if is_list:
+            # Pick up to 5 of the listed articles in a stable pseudo-random order
+            ids = [int(i) for i in re.findall(r"ID (\d+):", prompt)]
+            ids.sort(key=lambda i: hashlib.sha1(f"{digest}:{i}".encode()).hexdigest())
+            data = [self._fill(fields, id=i) for i in ids[:5]]
+        else:
+            data = self._fill(fields, conclusion="发钱的（红利）" if digest % 2 else "收网的（整顿）")
+
+        text = json.dumps(data, ensure_ascii=False)
+        return LLMResponse(text, self.model_for(role), len(prompt) // 4, len(text) // 4)
+
+    def _fill(self, fields, **overrides):
+        return {name: overrides.get(name, 0 if t is int else f"stub {name}") for name, t in fields.items()}
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "openai": OpenAIProvider,
+    "stub": StubProvider,
+}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+def get_provider(name: str = None) -> LLMProvider:
+    """Returns the process-wide provider selected by `name` or config.LLM_PROVIDER (created on first use)."""
+    name = (name or config.LLM_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER '{name}' (expected one of {', '.join(PROVIDERS)})")
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
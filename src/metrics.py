@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from .config import config
+
+# Note: .database is imported lazily because database.py itself records metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUANTILES = (0.5, 0.9, 0.99)
+# Upper bounds (seconds) of the latency histogram; one more bucket catches everything above
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_lock = threading.Lock()
+_series = {} # (run_id, name, labels) -> [sum, count, bucket counts or None, first recorded_at]
+# Per thread/context, so concurrent runs (and dashboard reruns next to a job) are attributed correctly.
+# New threads start without a run: pass `current_run()` to them and call `set_run` there.
+_run_id = contextvars.ContextVar("metrics_run_id", default=None)
+_flusher = None
+
+def start_run(kind: str = "run"):
+    """Starts a new run in the current context; observations recorded here until `end_run` are tagged with its ID."""
+    run_id = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    _run_id.set(run_id)
+    return run_id
+
+def end_run():
+    flush()
+    _run_id.set(None)
+
+def current_run():
+    return _run_id.get()
+
+def set_run(run_id):
+    """Attributes observations recorded in the current context (e.g. a worker thread) to `run_id`."""
+    _run_id.set(run_id)
+
+def record(name: str, value: float, **labels):
+    """
+    Adds one observation to its in-memory series. Names ending in _seconds are timings
+    (kept as sum, count and histogram buckets), _total are counter increments (sum and count).
+    Nothing touches the database here; a background thread flushes every METRICS_FLUSH_SECONDS.
+    """
+    if not config.METRICS_ENABLED:
+        return
+    key = (_run_id.get(), name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    value = float(value)
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            buckets = [0] * (len(BUCKETS) + 1) if name.endswith("_seconds") else None
+            series = _series[key] = [0.0, 0, buckets, datetime.utcnow()]
+        series[0] += value
+        series[1] += 1
+        if series[2] is not None:
+            series[2][bisect.bisect_left(BUCKETS, value)] += 1
+    if _flusher is None:
+        _start_flusher()
+
+def inc(name: str, value: float = 1, **labels):
+    record(name, value, **labels)
+
+@contextmanager
+def timer(name: str, **labels):
+    """Records the wall time of the block, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **labels)
+
+def record_llm_usage(response, stage: str):
+    """Counts prompt/completion tokens reported by an LLMResponse."""
+    inc("llm_tokens_total", response.prompt_tokens, model=response.model, stage=stage, kind="prompt")
+    inc("llm_tokens_total", response.completion_tokens, model=response.model, stage=stage, kind="completion")
+
+def flush():
+    """Writes one row per in-memory series to the metrics table. Returns the number of rows written."""
+    global _series
+    with _lock:
+        series, _series = _series, {}
+    if not series:
+        return 0
+    rows = [
+        {
+            "run_id": run_id,
+            "name": name,
+            "labels": json.dumps(dict(labels), sort_keys=True, ensure_ascii=False),
+            "value": total,
+            "samples": count,
+            "buckets": json.dumps(buckets) if buckets is not None else None,
+            "recorded_at": first_at,
+        }
+        for (run_id, name, labels), (total, count, buckets, first_at) in series.items()
+    ]
+    from .database import Metric, SessionLocal
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(Metric, rows)
+        cutoff = datetime.utcnow() - timedelta(days=config.METRICS_RETENTION_DAYS)
+        db.query(Metric).filter(Metric.recorded_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return len(rows)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error flushing metrics: {e}")
+        return 0
+    finally:
+        db.close()
+
+def _write_prometheus_file():
+    if not config.METRICS_PROM_PATH:
+        return
+    try:
+        write_prometheus(os.path.join(PROJECT_ROOT, config.METRICS_PROM_PATH))
+    except Exception as e:
+        logger.error(f"Error writing Prometheus file: {e}")
+
+def _flush_loop():
+    # Runs off the request path: crawler, analyzer and Streamlit threads only ever touch memory
+    while True:
+        time.sleep(config.METRICS_FLUSH_SECONDS)
+        if flush():
+            _write_prometheus_file()
+
+def _start_flusher():
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flusher.start()
+
+@atexit.register
+def _flush_at_exit():
+    if flush():
+        _write_prometheus_file()
+
+def load_metrics(since: datetime = None, name_suffix: str = None):
+    """Returns stored observations as dicts (labels decoded)."""
+    from .database import Metric, SessionLocal
+    db = SessionLocal()
+    try:
+        query = db.query(Metric.run_id, Metric.name, Metric.labels, Metric.value, Metric.samples, Metric.buckets, Metric.recorded_at)
+        if since:
+            query = query.filter(Metric.recorded_at >= since)
+        if name_suffix:
+            query = query.filter(Metric.name.like(f"%{name_suffix}"))
+        return [
+            {
+                "run_id": r.run_id, "name": r.name, "labels": json.loads(r.labels or "{}"),
+                "value": r.value, "samples": r.samples or 1, "buckets": json.loads(r.buckets) if r.buckets else None,
+                "recorded_at": r.recorded_at,
+            }
+            for r in query.all()
+        ]
+    finally:
+        db.close()
+
+def bucket_quantile(buckets, q: float):
+    """
+    Estimates a quantile from histogram bucket counts, interpolating linearly inside the bucket
+    like Prometheus' histogram_quantile. Values in the overflow bucket report the largest bound.
+    """
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]
+            lower = BUCKETS[i - 1] if i else 0.0
+            return lower + (BUCKETS[i] - lower) * (rank - seen) / count
+        seen += count
+    return BUCKETS[-1]
+
+def latency_summary(since: datetime = None):
+    """Count, mean and estimated percentiles per timing series (name + labels)."""
+    series = {}
+    for row in load_metrics(since, "_seconds"):
+        key = (row["name"], json.dumps(row["labels"], sort_keys=True, ensure_ascii=False))
+        agg = series.setdefault(key, [0.0, 0, [0] * (len(BUCKETS) + 1)])
+        agg[0] += row["value"]
+        agg[1] += row["samples"]
+        if row["buckets"]:
+            for i, n in enumerate(row["buckets"]):
+                agg[2][i] += n
+        else:
+            # Rows written before aggregation hold a single observation
+            agg[2][bisect.bisect_left(BUCKETS, row["value"])] += 1
+    summary = []
+    for (name, labels), (total, count, buckets) in sorted(series.items()):
+        item = {"name": name, "labels": labels, "count": count, "mean": total / count}
+        for q in QUANTILES:
+            item[f"p{int(q * 100)}"] = bucket_quantile(buckets, q)
+        summary.append(item)
+    return summary
+
+def token_cost(model: str, kind: str, tokens: float):
+    prompt_price, completion_price = config.LLM_PRICES.get(model, (0.0, 0.0))
+    return tokens / 1_000_000 * (prompt_price if kind == "prompt" else completion_price)
+
+def run_summary(since: datetime = None):
+    """Per-run duration, LLM calls, tokens and estimated cost, newest first."""
+    runs = {}
+    for row in load_metrics(since):
+        if not row["run_id"]:
+            continue
+        run = runs.setdefault(row["run_id"], {
+            "run_id": row["run_id"], "started": row["recorded_at"], "seconds": None,
+            "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        })
+        run["started"] = min(run["started"], row["recorded_at"])
+        labels = row["labels"]
+        if row["name"] == "pipeline_run_seconds":
+            run["seconds"] = row["value"]
+        elif row["name"] == "llm_request_seconds":
+            run["llm_calls"] += row["samples"]
+        elif row["name"] == "llm_tokens_total":
+            run[f"{labels.get('kind')}_tokens"] = run.get(f"{labels.get('kind')}_tokens", 0) + row["value"]
+            run["cost_usd"] += token_cost(labels.get("model"), labels.get("kind"), row["value"])
+    return sorted(runs.values(), key=lambda r: r["started"], reverse=True)
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prom_labels(labels: dict, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in sorted(items.items())) + "}"
+
+def render_prometheus():
+    """
+    Prometheus text exposition of the metrics table.
+    Counters and summary _sum/_count cover the retention period; quantiles the last METRICS_WINDOW_HOURS.
+    """
+    from sqlalchemy import func
+    from .database import Metric, SessionLocal
+    db = SessionLocal()
+    try:
+        totals = db.query(Metric.name, Metric.labels, func.sum(Metric.value), func.sum(func.coalesce(Metric.samples, 1))) \
+            .group_by(Metric.name, Metric.labels).order_by(Metric.name, Metric.labels).all()
+    finally:
+        db.close()
+
+    since = datetime.utcnow() - timedelta(hours=config.METRICS_WINDOW_HOURS)
+    quantiles = {(s["name"], s["labels"]): s for s in latency_summary(since)}
+
+    lines = []
+    declared = set()
+    for name, labels_json, total, count in totals:
+        labels = json.loads(labels_json or "{}")
+        kind = "summary" if name.endswith("_seconds") else "counter"
+        if name not in declared:
+            lines.append(f"# TYPE {name} {kind}")
+            declared.add(name)
+        if kind == "counter":
+            lines.append(f"{name}{_prom_labels(labels)} {total}")
+            continue
+        recent = quantiles.get((name, json.dumps(labels, sort_keys=True, ensure_ascii=False)))
+        if recent:
+            for q in QUANTILES:
+                lines.append(f"{name}{_prom_labels(labels, quantile=q)} {recent[f'p{int(q * 100)}']}")
+        lines.append(f"{name}_sum{_prom_labels(labels)} {total}")
+        lines.append(f"{name}_count{_prom_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: str):
+    """Atomically rewrites a Prometheus textfile (e.g. for node_exporter's textfile collector)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    # python -m src.metrics: print the current metrics in Prometheus text format
+    print(render_prometheus(), end="")
@@ -0,0 +1,233 @@
+import queue
+import logging
+import threading
+from .crawler import Crawler
+from .processor import Processor
+from .database import Article, SessionLocal, release_claims, recover_unfinished
+from .config import config
+from . import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sentinel passed down the queues once an upstream stage has finished
+STOP = object()
+
+class StreamingPipeline:
+    """
+    Runs crawl -> select -> analyze concurrently instead of one stage after the other.
+
+    - Crawl workers save articles and push their IDs into a bounded selection queue.
+    - A single selector groups IDs into Stage-2 batches of `select_batch` articles. Only the
+      final batch may be smaller, exactly as in a sequential run, because Stage 2 keeps the
+      top 5 of each batch and smaller batches would make proportionally more articles high-value.
+    - Analysis workers take selected IDs from a bounded queue and run Stage 3.
+
+    Full queues block the producer (backpressure). Each worker owns its DB session.
+    If a stage thread fails, the whole pipeline stops and `run()` raises the first error.
+    Unselected articles dropped on shutdown stay unprocessed. Selected ones that never reached
+    Stage 3 have their claims released, so the next run (streaming or sequential) analyzes them
+    first; claims left by a dead process expire after ARTICLE_CLAIM_MINUTES.
+    """
+
+    def __init__(self, urls, crawl_workers=None, analysis_workers=None, queue_size=None,
+                 select_batch=None, progress_callback=None):
+        self.urls = list(urls)
+        self.crawl_workers = crawl_workers or config.PIPELINE_CRAWL_WORKERS
+        self.analysis_workers = analysis_workers or config.PIPELINE_ANALYSIS_WORKERS
+        self.select_batch = select_batch or config.PIPELINE_SELECT_BATCH
+        self.progress_callback = progress_callback
+        # Worker threads don't inherit the caller's metrics run, so they set it themselves
+        self.run_id = metrics.current_run()
+
+        queue_size = queue_size or config.PIPELINE_QUEUE_SIZE
+        self.url_queue = queue.Queue()
+        self.select_queue = queue.Queue(maxsize=queue_size)
+        self.analyze_queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.errors = [] # (thread name, exception) of stage threads that failed
+        self.unanalyzed = [] # Selected IDs that could not be queued for Stage 3
+
+    def run(self):
+        """Runs until every source is crawled and every selected article is analyzed."""
+        for url in self.urls:
+            self.url_queue.put(url)
+
+        crawlers = [threading.Thread(target=self._crawl_loop, name=f"crawl-{i}", daemon=True)
+                    for i in range(min(self.crawl_workers, len(self.urls)) or 1)]
+        selector = threading.Thread(target=self._select_loop, name="select", daemon=True)
+        analyzers = [threading.Thread(target=self._analyze_loop, name=f"analyze-{i}", daemon=True)
+                     for i in range(self.analysis_workers)]
+
+        logger.info(f"Streaming pipeline: {len(self.urls)} sources, {len(crawlers)} crawlers, {len(analyzers)} analyzers")
+        for t in crawlers + [selector] + analyzers:
+            t.start()
+
+        try:
+            # Shut down stage by stage: the selector flushes its last batch once all crawlers are done
+            self._join(crawlers)
+            self._put(self.select_queue, STOP)
+            self._join([selector])
+            self._join(analyzers)
+        except KeyboardInterrupt:
+            logger.info("Stopping streaming pipeline...")
+            self.stop()
+            self._join(crawlers + [selector] + analyzers)
+            raise
+        finally:
+            self._release_unanalyzed()
+        if self.errors:
+            name, error = self.errors[0]
+            raise RuntimeError(f"Streaming pipeline stopped: {name} failed: {error}") from error
+        logger.info("Streaming pipeline complete.")
+
+    def _release_unanalyzed(self):
+        """Releases selected articles that never reached Stage 3 so the next run recovers them."""
+        ids = list(self.unanalyzed)
+        while True:
+            try:
+                item = self.analyze_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not STOP:
+                ids.append(item)
+        if not ids:
+            return
+        logger.info(f"Releasing {len(ids)} selected articles that were not analyzed.")
+        db = SessionLocal()
+        try:
+            release_claims(db, ids)
+        except Exception as e:
+            logger.error(f"Error releasing selected articles: {e}")
+        finally:
+            db.close()
+
+    def stop(self):
+        """Asks every stage to exit after its current item."""
+        self.stop_event.set()
+
+    def _fail(self, error):
+        """Records a stage thread's error and stops the other stages, which would otherwise wait on it forever."""
+        name = threading.current_thread().name
+        logger.error(f"Streaming pipeline {name} failed: {error}")
+        self.errors.append((name, error))
+        self.stop()
+
+    def _join(self, threads):
+        # Short timeouts keep the main thread responsive to Ctrl+C
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=0.5)
+
+    def _put(self, q, item):
+        """Blocking put that gives up when the pipeline is stopping."""
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _report(self, stage, count):
+        if self.progress_callback and count:
+            try:
+                self.progress_callback(stage, count)
+            except Exception as e:
+                logger.error(f"Progress callback failed: {e}")
+
+    def _crawl_loop(self):
+        metrics.set_run(self.run_id)
+        crawler = None
+        try:
+            crawler = Crawler()
+            while not self.stop_event.is_set():
+                try:
+                    url = self.url_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    with metrics.timer("pipeline_stage_seconds", stage="crawl"):
+                        saved = crawler.crawl_site(url, on_article=lambda article_id: self._put(self.select_queue, article_id))
+                    self._report("crawled", saved)
+                except Exception as e:
+                    logger.error(f"Error crawling {url}: {e}")
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if crawler:
+                crawler.close()
+
+    def _select_loop(self):
+        metrics.set_run(self.run_id)
+        processor = None
+        try:
+            processor = Processor()
+            # Finish articles an earlier run selected but never analyzed
+            for article_id in recover_unfinished(processor.db):
+                if not self._put(self.analyze_queue, article_id):
+                    self.unanalyzed.append(article_id)
+            # Start with the backlog left over from earlier runs
+            pending = [a.id for a in processor.db.query(Article.id).filter(Article.is_processed == False).order_by(Article.id)]
+            upstream_done = False
+
+            while not self.stop_event.is_set():
+                # A partial batch is only selected once the crawlers are done
+                if len(pending) >= self.select_batch or (pending and upstream_done):
+                    batch, pending = pending[:self.select_batch], pending[self.select_batch:]
+                    self._select_batch(processor, batch)
+                    continue
+                if upstream_done:
+                    return
+
+                try:
+                    item = self.select_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is STOP:
+                    upstream_done = True
+                else:
+                    pending.append(item)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.analysis_workers):
+                self._put(self.analyze_queue, STOP)
+            if processor:
+                processor.close()
+
+    def _select_batch(self, processor, ids):
+        articles = processor.db.query(Article).filter(Article.id.in_(ids), Article.is_processed == False).all()
+        if not articles:
+            return
+        logger.info(f"Selecting from batch of {len(articles)} articles...")
+        with metrics.timer("pipeline_stage_seconds", stage="select"):
+            selected = processor.select_high_value_articles(articles)
+        self._report("selected", len(selected))
+        for i, article in enumerate(selected):
+            if not self._put(self.analyze_queue, article.id):
+                self.unanalyzed.extend(a.id for a in selected[i:])
+                return
+
+    def _analyze_loop(self):
+        metrics.set_run(self.run_id)
+        processor = None
+        try:
+            processor = Processor()
+            while not self.stop_event.is_set():
+                try:
+                    item = self.analyze_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is STOP:
+                    return
+                article = processor.db.get(Article, item)
+                if article:
+                    with metrics.timer("pipeline_stage_seconds", stage="analyze"):
+                        processor.analyze_article(article)
+                    self._report("analyzed", 1)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if processor:
+                processor.close()
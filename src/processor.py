@@ -1,9 +1,10 @@
 import logging
 import json
 from sqlalchemy.orm import Session
-from .database import Article, get_db, SessionLocal, get_setting
+from .database import Article, get_db, SessionLocal, get_setting, bump_data_version, add_to_daily_digest, mark_processed, claim_for_selection, release_selection, release_claims, recover_unfinished
 from .config import config
-import google.generativeai as genai
+from . import metrics
+from .llm import get_provider
 import typing_extensions as typing
 
 logging.basicConfig(level=logging.INFO)
@@ -23,14 +24,43 @@ class PolicyAnalysis(typing.TypedDict):
     entities: str
     conclusion: str
 
+# Default prompts, also shown in the dashboard's prompt editor until custom ones are saved
+
+# Stage 2 (Macro Bonus Sniper) - Purified
+DEFAULT_SELECTION_PROMPT = """Role: 宏观红利狙击手
+Context: 只有能改变社会资源分配规则的新闻才值得关注
+Criteria: 
+1. 是否涉及[税收/社保/户籍]等顶层设计变动？(政策红利/黑天鹅) 
+2. 是否出现跨阶层的[造富/返贫]现象？(风口预警) 
+3. 是否改变了[特定行业]的准入门槛？(竞争壁垒) 
+
+Task:
+Review the following articles. Select the TOP 5 most impactful articles based on the criteria.
+Rank them from 1 (most impactful) to 5.
+
+Articles:
+{articles_list}
+"""
+
+# Stage 3 (Policy Arbitrage Analyst) - Purified
+DEFAULT_ANALYSIS_PROMPT = """Role: 冷酷的政策套利分析师
+Task: Analyze the text.
+
+Content:
+{content} 
+
+Requirements:
+1. 【矛盾点】(contradictions): 提取文中“既要...又要...”的内容，并判断哪一个是当前的真实KPI（排在后面或有量化指标的）。
+2. 【温差】(temperature_diff): 对比该行业去年的常规表述，提取变化的形容词（如从“大力发展”变为“规范有序”）。
+3. 【负面清单】(negative_list): 提取所有“严禁”、“不得”、“清理”后面的具体行为。
+4. 【实体信息】(entities): 提取文中所有的金额、日期、负责部门。
+5. 【一句话结论】(conclusion): 这文件是发钱的（红利），还是收网的（整顿）？
+"""
+
 class Processor:
-    def __init__(self):
+    def __init__(self, llm=None):
         self.db: Session = SessionLocal()
-        self.setup_llm()
-
-    def setup_llm(self):
-        if config.LLM_PROVIDER == "gemini":
-            genai.configure(api_key=config.GEMINI_API_KEY)
+        self.llm = llm or get_provider()
 
     def select_high_value_articles(self, articles: list[Article]):
         """
@@ -40,28 +70,18 @@ class Processor:
         if not articles:
             return []
 
+        # Claim the batch before the LLM call: another run may be working through the same backlog
+        claimed = claim_for_selection(self.db, [a.id for a in articles])
+        articles = [a for a in articles if a.id in claimed]
+        if not articles:
+            return []
+        ids = [a.id for a in articles]
+
         # Prepare the list for the prompt
         articles_list = "\n".join([f"ID {a.id}: {a.title}" for a in articles])
         
-        # Default prompt (Macro Bonus Sniper) - Purified
-        default_prompt = """
-        Role: 宏观红利狙击手
-        Context: 只有能改变社会资源分配规则的新闻才值得关注
-        Criteria: 
-        1. 是否涉及[税收/社保/户籍]等顶层设计变动？(政策红利/黑天鹅) 
-        2. 是否出现跨阶层的[造富/返贫]现象？(风口预警) 
-        3. 是否改变了[特定行业]的准入门槛？(竞争壁垒) 
-        
-        Task:
-        Review the following articles. Select the TOP 5 most impactful articles based on the criteria.
-        Rank them from 1 (most impactful) to 5.
-        
-        Articles:
-        {articles_list}
-        """
-        
         # Load from DB or use default
-        prompt_template = get_setting("prompt_selection", default_prompt)
+        prompt_template = get_setting("prompt_selection", DEFAULT_SELECTION_PROMPT)
         
         # If the user edited the prompt, they might have removed the placeholder. 
         # We need to ensure {articles_list} is in there or append it.
@@ -71,16 +91,10 @@ class Processor:
             prompt = prompt_template + "\n\nArticles:\n" + articles_list
 
         try:
-            model = genai.GenerativeModel(config.MODEL_SELECTION)
-            
-            # Use response_schema for hard constraint
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json",
-                    response_schema=list[ArticleSelection]
-                )
-            )
+            # The provider enforces the schema (natively where supported)
+            with metrics.timer("llm_request_seconds", model=self.llm.model_for("selection"), stage="select"):
+                response = self.llm.generate_json("selection", prompt, list[ArticleSelection])
+            metrics.record_llm_usage(response, "select")
             
             text = response.text.strip()
             # Clean up potential markdown code blocks (though less likely with schema)
@@ -107,6 +121,7 @@ class Processor:
                     article.is_high_value = True
                     # Prepend the selection insights to the report (or placeholder)
                     meta = results_map[article.id]
+                    article.analysis_data = json.dumps({"selection": meta}, ensure_ascii=False)
                     article.analysis_report = f"""
 **🎯 狙击手简报**
 - **信号**: {meta.get('Signal')}
@@ -117,12 +132,24 @@ class Processor:
                     selected_articles.append(article)
                 else:
                     article.is_high_value = False
+                    # Nothing more to do for this one; high-value articles are stamped after Stage 3
+                    if mark_processed(self.db, article):
+                        add_to_daily_digest(self.db, article)
+            bump_data_version(self.db)
             self.db.commit()
             
             return selected_articles
             
         except Exception as e:
             logger.error(f"Error in batch selection: {e}")
+            metrics.inc("processor_errors_total", stage="select")
+            # Give the batch back so the next run retries it
+            self.db.rollback()
+            try:
+                release_selection(self.db, ids)
+            except Exception as e:
+                logger.error(f"Error releasing batch: {e}")
+                self.db.rollback()
             return []
 
     def analyze_article(self, article: Article):
@@ -130,23 +157,7 @@ class Processor:
         Stage 3: Analysis
         Uses stronger LLM to analyze the article using "Policy Arbitrage Analyst" persona.
         """
-        # Default prompt (Policy Arbitrage Analyst) - Purified
-        default_prompt = """
-        Role: 冷酷的政策套利分析师
-        Task: Analyze the text.
-        
-        Content:
-        {content} 
-        
-        Requirements:
-        1. 【矛盾点】(contradictions): 提取文中“既要...又要...”的内容，并判断哪一个是当前的真实KPI（排在后面或有量化指标的）。
-        2. 【温差】(temperature_diff): 对比该行业去年的常规表述，提取变化的形容词（如从“大力发展”变为“规范有序”）。
-        3. 【负面清单】(negative_list): 提取所有“严禁”、“不得”、“清理”后面的具体行为。
-        4. 【实体信息】(entities): 提取文中所有的金额、日期、负责部门。
-        5. 【一句话结论】(conclusion): 这文件是发钱的（红利），还是收网的（整顿）？
-        """
-        
-        prompt_template = get_setting("prompt_analysis", default_prompt)
+        prompt_template = get_setting("prompt_analysis", DEFAULT_ANALYSIS_PROMPT)
         
         content_snippet = article.content[:8000]
         if "{content}" in prompt_template:
@@ -155,16 +166,10 @@ class Processor:
             prompt = prompt_template + "\n\nContent:\n" + content_snippet
 
         try:
-            model = genai.GenerativeModel(config.MODEL_ANALYSIS)
-            
-            # Use response_schema for hard constraint
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json",
-                    response_schema=PolicyAnalysis
-                )
-            )
+            # The provider enforces the schema (natively where supported)
+            with metrics.timer("llm_request_seconds", model=self.llm.model_for("analysis"), stage="analyze"):
+                response = self.llm.generate_json("analysis", prompt, PolicyAnalysis)
+            metrics.record_llm_usage(response, "analyze")
             
             text = response.text.strip()
             # Clean up potential markdown code blocks
@@ -173,6 +178,7 @@ class Processor:
                 if text.endswith("```"):
                     text = text.rsplit("\n", 1)[0]
             
+            data = None
             try:
                 data = json.loads(text)
                 formatted_report = f"""
@@ -192,16 +198,50 @@ class Processor:
                 article.analysis_report += "\n" + formatted_report
             else:
                 article.analysis_report = formatted_report
+
+            if data is not None:
+                analysis_data = json.loads(article.analysis_data) if article.analysis_data else {}
+                analysis_data["analysis"] = data
+                article.analysis_data = json.dumps(analysis_data, ensure_ascii=False)
+            if not mark_processed(self.db, article):
+                # Another run finished it in the meantime; keep its result
+                self.db.rollback()
+                logger.info(f"Article {article.id} was already analyzed by another run")
+                return
+            add_to_daily_digest(self.db, article, high_value=True, conclusion=data.get('conclusion') if data else None)
+            bump_data_version(self.db)
                 
             self.db.commit()
             logger.info(f"Analyzed article: {article.title}")
         except Exception as e:
             logger.error(f"Error analyzing article {article.id}: {e}")
+            metrics.inc("processor_errors_total", stage="analyze")
+            # Still mark it as finished so exports are not held back by a failed analysis
+            self.db.rollback()
+            try:
+                if mark_processed(self.db, article):
+                    add_to_daily_digest(self.db, article, high_value=True)
+                    bump_data_version(self.db)
+                    self.db.commit()
+                else:
+                    self.db.rollback()
+            except Exception as e:
+                # E.g. the original error was a lock timeout: log it instead of aborting the batch or analyzer thread
+                logger.error(f"Error marking article {article.id} as processed: {e}")
+                self.db.rollback()
 
-    def process_pending_articles(self):
+    def process_pending_articles(self, progress_callback=None):
         """
         Main loop to process unprocessed articles in batches.
+        `progress_callback(stage, count)` is called with "selected"/"analyzed" increments, if given.
         """
+        # First finish articles an earlier run selected but never analyzed
+        recovered = recover_unfinished(self.db)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} selected articles that were never analyzed.")
+            articles = self.db.query(Article).filter(Article.id.in_(recovered)).order_by(Article.id).all()
+            self.analyze_articles(articles, progress_callback)
+
         while True:
             # Get next batch of unprocessed articles
             # Limit to 20 at a time to fit in context window
@@ -214,11 +254,36 @@ class Processor:
             logger.info(f"Processing batch of {len(articles)} articles...")
             
             # 1. Batch Selection
-            high_value_articles = self.select_high_value_articles(articles)
+            with metrics.timer("pipeline_stage_seconds", stage="select"):
+                high_value_articles = self.select_high_value_articles(articles)
+            if not any(a.is_processed for a in articles):
+                # Selection failed (e.g. LLM error); retrying the same batch would loop forever
+                logger.error("Batch selection failed, stopping until the next run.")
+                break
             
             # 2. Individual Analysis
-            for article in high_value_articles:
-                self.analyze_article(article)
+            self.analyze_articles(high_value_articles, progress_callback, report_selected=True)
+
+    def analyze_articles(self, articles: list[Article], progress_callback=None, report_selected=False):
+        """
+        Runs Stage 3 on claimed articles. If this stops early (e.g. the progress callback raises),
+        the claims on the rest are released, so the next run picks them up via `recover_unfinished`.
+        """
+        ids = [a.id for a in articles]
+        try:
+            if report_selected and progress_callback:
+                progress_callback("selected", len(articles))
+            for article in articles:
+                with metrics.timer("pipeline_stage_seconds", stage="analyze"):
+                    self.analyze_article(article)
+                if progress_callback:
+                    progress_callback("analyzed", 1)
+        finally:
+            try:
+                self.db.rollback()
+                release_claims(self.db, ids)
+            except Exception as e:
+                logger.error(f"Error releasing claimed articles: {e}")
 
     def close(self):
         self.db.close()
@@ -0,0 +1,78 @@
+import random
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from .database import Source, SessionLocal
+from .config import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Weight of the newest gap in the change-rate estimate
+CHANGE_GAP_ALPHA = 0.3
+
+def clamp_interval(minutes: float):
+    return max(config.SOURCE_INTERVAL_MIN_MINUTES, min(config.SOURCE_INTERVAL_MAX_MINUTES, minutes))
+
+def next_interval(source: Source, new_articles: int, ok: bool = True, now: datetime = None):
+    """
+    Returns the next crawl interval (minutes) for a source and updates its change-rate estimate.
+
+    - Failed visit: keep the interval, just retry later.
+    - Nothing new: back off by SOURCE_BACKOFF_FACTOR.
+    - New articles: aim for two visits per estimated change period; a burst also halves the interval.
+    """
+    now = now or datetime.utcnow()
+    interval = source.crawl_interval_minutes or config.SOURCE_INTERVAL_DEFAULT_MINUTES
+    if not ok:
+        return clamp_interval(interval)
+    if not new_articles:
+        return clamp_interval(interval * config.SOURCE_BACKOFF_FACTOR)
+
+    if source.last_changed_at:
+        gap = (now - source.last_changed_at).total_seconds() / 60
+        if source.change_gap_minutes is None:
+            source.change_gap_minutes = gap
+        else:
+            source.change_gap_minutes = CHANGE_GAP_ALPHA * gap + (1 - CHANGE_GAP_ALPHA) * source.change_gap_minutes
+    source.last_changed_at = now
+
+    target = source.change_gap_minutes / 2 if source.change_gap_minutes else interval
+    if new_articles >= config.SOURCE_BURST_ARTICLES:
+        target = min(target, interval / 2)
+    return clamp_interval(target)
+
+def record_visit(db, url: str, new_articles: int, ok: bool = True):
+    """Records a crawl of `url` and schedules its next visit. No-op for URLs that are not configured sources."""
+    source = db.query(Source).filter(Source.url == url).first()
+    if not source:
+        return None
+    now = datetime.utcnow()
+    interval = next_interval(source, new_articles, ok, now)
+    # Jitter spreads sources out instead of letting them fire together
+    jittered = interval * random.uniform(1 - config.SOURCE_JITTER, 1 + config.SOURCE_JITTER)
+
+    source.crawl_interval_minutes = interval
+    source.last_crawled_at = now
+    source.next_crawl_at = now + timedelta(minutes=jittered)
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording visit for {url}: {e}")
+        return None
+    logger.info(f"Next crawl of {url} in {jittered:.0f} min ({new_articles} new)")
+    return source.next_crawl_at
+
+def get_due_urls(now: datetime = None):
+    """Returns URLs of sources whose next visit is due (never-crawled sources first)."""
+    now = now or datetime.utcnow()
+    db = SessionLocal()
+    try:
+        sources = (db.query(Source)
+                   .filter(or_(Source.next_crawl_at.is_(None), Source.next_crawl_at <= now))
+                   .order_by(Source.next_crawl_at.isnot(None), Source.next_crawl_at)
+                   .all())
+        return [s.url for s in sources]
+    finally:
+        db.close()